@@ -1,54 +1,765 @@
 import csv
-import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 
-from django.core.management.base import BaseCommand
-from django.shortcuts import get_object_or_404
-from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+import django
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, models, transaction
+from reviews.fuzzy import index_names, rebuild_trigrams
+from reviews.models import (Category, Comment, Genre, GenreTitle,
+                            LeaderboardEntry, LoadCheckpoint, Review, Title)
+from reviews.search import index_titles, rebuild_index
+from reviews.signals import suspended_signals
 from users.models import User
 
-logging.basicConfig(level=logging.INFO)
+from api.signals import DEPENDENT_MODELS, SCOPE_FIELDS
+from api.versions import bump_version
 
+DATA_DIR = 'static/data'
+BATCH_SIZE = 1000
+FILES = (
+    (User, 'users.csv'),
+    (Category, 'category.csv'),
+    (Genre, 'genre.csv'),
+    (Title, 'titles.csv'),
+    (GenreTitle, 'genre_title.csv'),
+    (Review, 'review.csv'),
+    (Comment, 'comments.csv'),
+)
+# Атрибут, которым строки модели ссылаются на произведение: при их
+# изменении пересчитываются рейтинг, таблица лучших и индексы.
+TITLE_FIELDS = {
+    Title: 'id',
+    GenreTitle: 'title_id',
+    Review: 'title_id',
+}
+# Атрибуты, значения которых запоминаются для изменённых строк.
+TOUCHED_FIELDS = {
+    model: tuple(dict.fromkeys(
+        attname for attname in (TITLE_FIELDS.get(model),
+                                SCOPE_FIELDS.get(model)) if attname
+    ))
+    for model, _ in FILES
+}
 
-def load(model, path, related_models=None,):
-    logging.info(f'Загрузка данных в таблицу {model.__name__}')
-    model.objects.all().delete()
 
-    with open(path) as file:
-        reader = csv.DictReader(file)
+def foreign_key_ids(field):
+    return set(field.related_model.objects.values_list(
+        field.target_field.attname, flat=True
+    ))
+
+
+def foreign_key_parser(field, ids=None):
+    """Проверка внешнего ключа по множеству id связанной модели,
+    прочитанному из БД один раз на файл, если оно не передано."""
+
+    if ids is None:
+        ids = foreign_key_ids(field)
+    to_python = field.target_field.to_python
+
+    def parse(value):
+        if value == '' and field.null:
+            return None
+        value = to_python(value)
+        if value not in ids:
+            raise ValidationError(
+                f'{field.related_model.__name__} с id {value} не найден'
+            )
+        return value
+    return parse
+
+
+def field_parser(field):
+    """Преобразование и проверка значения поля без запросов к БД.
+
+    Как и при model.objects.create, choices и blank не проверяются:
+    роли пользователей в данных записаны не так, как в choices модели.
+    """
+
+    def parse(value):
+        if value == '' and field.null:
+            return None
+        value = field.to_python(value)
+        if value is None:
+            raise ValidationError(field.error_messages['null'])
+        field.run_validators(value)
+        return value
+    return parse
+
+
+def column_parsers(model, columns, ids=None):
+    """Имя атрибута модели и функция разбора для каждого столбца CSV.
+    Столбец называется как поле модели или как его атрибут (title_id).
+
+    ids - множества id для внешних ключей по меткам связанных моделей;
+    без них id читаются из БД.
+    """
+
+    parsers = []
+    for column in columns:
+        try:
+            field = model._meta.get_field(column)
+        except FieldDoesNotExist:
+            raise CommandError(
+                f'В модели {model.__name__} нет поля для столбца {column}'
+            )
+        if field.is_relation:
+            parse = foreign_key_parser(
+                field,
+                ids and ids[field.related_model._meta.label]
+            )
+        else:
+            parse = field_parser(field)
+        parsers.append((column, field.attname, parse))
+    return parsers
+
+
+def parse_row(row, parsers):
+    """Значения атрибутов модели из строки CSV. Ошибка поднимается
+    как ValidationError с именем столбца в сообщении."""
+
+    values = {}
+    for column, attname, parse in parsers:
+        try:
+            values[attname] = parse(row[column])
+        except ValidationError as error:
+            raise ValidationError(f'{column}: {error.messages}')
+    return values
+
+
+def dependency_levels(models):
+    """Модели по уровням графа внешних ключей: модели уровня ссылаются
+    только на модели предыдущих уровней и загружаются одновременно."""
+
+    dependencies = {
+        model: {field.related_model for field in model._meta.concrete_fields
+                if field.is_relation and field.related_model in models
+                and field.related_model is not model}
+        for model in models
+    }
+    levels = []
+    done = set()
+    while len(done) < len(models):
+        level = [model for model in models if model not in done
+                 and dependencies[model] <= done]
+        if not level:
+            raise CommandError('Внешние ключи моделей образуют цикл')
+        levels.append(level)
+        done.update(level)
+    return levels
+
+
+def wipe_table(model, cleared_models):
+    """Очищает таблицу модели одним DELETE без сборщика удаляемых
+    объектов. Сначала так же очищаются таблицы, ссылающиеся на неё с
+    каскадным удалением, а ссылки SET_NULL обнуляются, как при обычном
+    удалении. cleared_models - множество уже очищенных моделей, которое
+    пополняется и при рекурсивных вызовах."""
+
+    if model in cleared_models:
+        return
+    cleared_models.add(model)
+    for relation in model._meta.get_fields(include_hidden=True):
+        if relation.concrete or not (relation.one_to_many
+                                     or relation.one_to_one):
+            continue
+        dependent, field = relation.related_model, relation.field
+        if dependent is model or relation.on_delete is models.DO_NOTHING:
+            continue
+        referencing = dependent._base_manager.filter(
+            **{f'{field.name}__isnull': False}
+        )
+        if relation.on_delete is models.SET_NULL:
+            referencing.update(**{field.name: None})
+        elif relation.on_delete is not models.CASCADE:
+            raise CommandError(
+                f'Таблицу {model.__name__} нельзя очистить: на неё '
+                f'ссылается {dependent.__name__}.{field.name}'
+            )
+        elif field.null:
+            referencing.delete()
+        else:
+            wipe_table(dependent, cleared_models)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}'
+        )
+
+
+def wipe_tables(wiped):
+    """Очищает таблицы моделей wiped от зависимых к основным. Сигналы
+    удаления не отправляются: производные данные затем пересчитывает
+    rebuild_derived_data."""
+
+    cleared_models = set()
+    with transaction.atomic():
+        for level in reversed(dependency_levels(wiped)):
+            for model in level:
+                wipe_table(model, cleared_models)
+
+
+def interleave(*iterables):
+    """Элементы итераторов по очереди, пока не исчерпаются все."""
+
+    iterators = [iter(iterable) for iterable in iterables]
+    while iterators:
+        for iterator in list(iterators):
+            try:
+                yield next(iterator)
+            except StopIteration:
+                iterators.remove(iterator)
+
+
+# Множества id внешних ключей в процессе-исполнителе пула.
+worker_ids = {}
+
+
+def init_worker(ids):
+    if not apps.ready:
+        django.setup()
+    worker_ids.clear()
+    worker_ids.update(ids)
+
+
+@lru_cache(maxsize=None)
+def worker_parsers(label, columns):
+    return column_parsers(apps.get_model(label), columns, worker_ids)
+
+
+def parse_shard(label, columns, rows):
+    """Разбор части файла в процессе пула: значения полей корректных
+    строк и сообщения об ошибках остальных с номерами строк."""
+
+    parsers = worker_parsers(label, columns)
+    values, errors = [], []
+    for line, row in rows:
+        try:
+            values.append((line, parse_row(row, parsers)))
+        except ValidationError as error:
+            errors.append((line, error.message))
+    return values, errors
+
+
+class Loader:
+    """Загрузка CSV-файла в таблицу модели пакетами bulk_create.
+    Таблицу предварительно очищает wipe_tables."""
+
+    def __init__(self, model, path, batch_size=BATCH_SIZE, report=None):
+        self.model = model
+        self.path = path
+        self.batch_size = batch_size
+        self.report = report
+        self.loaded = 0
+        self.rejected = 0
+
+    def reject(self, line, error):
+        self.rejected += 1
+        if self.report:
+            self.report(f'{os.path.basename(self.path)}:{line}: {error}')
+
+    def line_number(self, reader):
+        return reader.line_num
+
+    def parse(self, reader, parsers):
+        """Объекты модели из строк файла; строки с ошибками
+        отбрасываются."""
 
         for row in reader:
             try:
-                logging.info(row)
+                values = parse_row(row, parsers)
+            except ValidationError as error:
+                self.reject(self.line_number(reader), error.message)
+                continue
+            yield self.line_number(reader), self.model(**values)
+
+    def write(self, batch, method):
+        """Записывает пакет одним вызовом method(objects). Если пакет
+        нарушает ограничения БД, строки записываются по одной, чтобы
+        отбросить только ошибочные. Возвращает число записанных строк."""
+
+        try:
+            with transaction.atomic():
+                method([obj for _, obj in batch])
+            return len(batch)
+        except IntegrityError:
+            pass
+        written = 0
+        for line, obj in batch:
+            try:
+                with transaction.atomic():
+                    method([obj])
+                written += 1
+            except IntegrityError as error:
+                self.reject(line, error)
+        return written
+
+    def insert(self, batch):
+        self.loaded += self.write(batch, self.model.objects.bulk_create)
+
+    @property
+    def rows(self):
+        return self.loaded
+
+    def describe(self):
+        return f'загружено {self.loaded}, отклонено {self.rejected}'
 
-                if related_models:
-                    for rel_model in related_models:
-                        related_name = rel_model[0]
-                        csv_name = rel_model[1]
-                        mod = rel_model[2]
-                        id = row.pop(csv_name)
-                        mod = get_object_or_404(mod, id=id)
-                        row[related_name] = mod
+    def load(self):
+        with open(self.path, encoding='utf-8', newline='') as file:
+            reader = csv.DictReader(file)
+            parsers = column_parsers(self.model, reader.fieldnames or ())
+            with transaction.atomic():
+                batch = []
+                for item in self.parse(reader, parsers):
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        self.insert(batch)
+                        batch = []
+                if batch:
+                    self.insert(batch)
 
-                model.objects.create(**row)
-            except Exception:
-                logging.warning('Ошибка в данных')
+    def shards(self, ids):
+        """Части файла по batch_size строк для parse_shard. Столбцы
+        проверяются здесь, чтобы ошибка в заголовке остановила команду
+        до запуска пула."""
+
+        with open(self.path, encoding='utf-8', newline='') as file:
+            reader = csv.DictReader(file)
+            columns = tuple(reader.fieldnames or ())
+            column_parsers(self.model, columns, ids)
+            shard = []
+            for row in reader:
+                shard.append((reader.line_num, row))
+                if len(shard) >= self.batch_size:
+                    yield self, columns, shard
+                    shard = []
+            if shard:
+                yield self, columns, shard
+
+
+class StreamingLoader(Loader):
+    """Потоковая загрузка с продолжением после прерывания.
+
+    Таблица не очищается, а каждый пакет фиксируется в отдельной
+    транзакции вместе с LoadCheckpoint: смещением в файле после
+    последней разобранной строки. Файл читается построчно в двоичном
+    режиме, и смещение считается по прочитанным байтам: csv.reader не
+    читает строки наперёд, поэтому после каждой записи смещение
+    указывает ровно на её конец, даже если значения содержат переводы
+    строк. Повторный запуск пропускает зафиксированную часть файла.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.offset = 0
+        self.line = 0
+        self.resumed_from = 0
+
+    def lines(self, file):
+        for line in file:
+            self.offset += len(line)
+            self.line += 1
+            yield line.decode('utf-8')
+
+    def line_number(self, reader):
+        return self.line
+
+    def commit(self, batch, checkpoint, loaded, rejected):
+        """Вставляет пакет и сохраняет позицию одной транзакцией.
+        loaded и rejected - счётчики файла до этого запуска."""
+
+        with transaction.atomic():
+            self.insert(batch)
+            checkpoint.offset = self.offset
+            checkpoint.line = self.line
+            checkpoint.loaded = loaded + self.loaded
+            checkpoint.rejected = rejected + self.rejected
+            checkpoint.save()
+
+    def load(self):
+        checkpoint, _ = LoadCheckpoint.objects.get_or_create(
+            path=os.path.abspath(self.path)
+        )
+        totals = checkpoint.loaded, checkpoint.rejected
+        with open(self.path, 'rb') as file:
+            reader = csv.DictReader(self.lines(file))
+            parsers = column_parsers(self.model, reader.fieldnames or ())
+            if checkpoint.offset > os.fstat(file.fileno()).st_size:
+                raise CommandError(
+                    f'Файл {self.path} короче сохранённой позиции; '
+                    'запустите загрузку с --restart'
+                )
+            if checkpoint.offset > self.offset:
+                file.seek(checkpoint.offset)
+                self.offset = checkpoint.offset
+                self.line = self.resumed_from = checkpoint.line
+            batch = []
+            for item in self.parse(reader, parsers):
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self.commit(batch, checkpoint, *totals)
+                    batch = []
+            self.commit(batch, checkpoint, *totals)
+
+
+def chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def fingerprint(values):
+    """Отпечаток значений строки. Для сравнения файла с таблицей
+    в памяти хранятся отпечатки, а не копии строк."""
+
+    return hash(tuple(values))
+
+
+class UpsertLoader(Loader):
+    """Синхронизация таблицы с файлом по первичному ключу без очистки.
+
+    Отпечатки строк таблицы по столбцам файла читаются один раз; строки
+    файла с новыми ключами вставляются, с изменившимся отпечатком -
+    обновляются bulk_update, остальные пропускаются. Ключи, которых не
+    оказалось в файле, остаются в missing. В touched собираются старые
+    и новые значения атрибутов TOUCHED_FIELDS изменённых строк.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updated = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.missing = set()
+        self.touched = {
+            attname: set() for attname in TOUCHED_FIELDS.get(self.model, ())
+        }
+
+    def read_fingerprints(self, attnames):
+        tracked = [attnames.index(attname) for attname in self.touched]
+        existing = {}
+        for row in (self.model.objects.order_by()
+                    .values_list(*attnames).iterator()):
+            existing[row[0]] = (fingerprint(row),
+                                [row[index] for index in tracked])
+        return existing
+
+    def touch(self, values):
+        for attname, value in zip(self.touched, values):
+            self.touched[attname].add(value)
+
+    def upsert(self, batch, attnames, fields, existing):
+        new, changed = [], []
+        for line, obj in batch:
+            stored = existing.pop(obj.pk, None)
+            values = [getattr(obj, attname) for attname in attnames]
+            if stored is None:
+                new.append((line, obj))
+            elif stored[0] != fingerprint(values):
+                changed.append((line, obj))
+                self.touch(stored[1])
+            else:
+                self.unchanged += 1
+                continue
+            self.touch(getattr(obj, attname) for attname in self.touched)
+        self.insert(new)
+        if not changed:
+            return
+        for _, obj in changed:
+            for field in self.model._meta.concrete_fields:
+                if getattr(field, 'auto_now', False):
+                    field.pre_save(obj, add=False)
+        self.updated += self.write(changed, partial(
+            self.model.objects.bulk_update, fields=fields
+        ))
+
+    def load(self):
+        with open(self.path, encoding='utf-8', newline='') as file:
+            reader = csv.DictReader(file)
+            parsers = column_parsers(self.model, reader.fieldnames or ())
+            pk = self.model._meta.pk.attname
+            # Даты с auto_now и auto_now_add при записи заполняет модель,
+            # а не файл, поэтому они не сравниваются.
+            generated = {
+                field.attname for field in self.model._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
+                or getattr(field, 'auto_now_add', False)
+            }
+            attnames = [attname for _, attname, _ in parsers
+                        if attname not in generated]
+            if pk not in attnames:
+                raise CommandError(
+                    f'В файле {self.path} нет столбца первичного ключа {pk}'
+                )
+            attnames = [pk] + [name for name in attnames if name != pk]
+            self.touched = {attname: values
+                            for attname, values in self.touched.items()
+                            if attname in attnames}
+            fields = attnames[1:] + [
+                field.attname for field in self.model._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
+            ]
+            existing = self.read_fingerprints(attnames)
+            with transaction.atomic():
+                batch = []
+                for item in self.parse(reader, parsers):
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        self.upsert(batch, attnames, fields, existing)
+                        batch = []
+                self.upsert(batch, attnames, fields, existing)
+        self.missing = set(existing)
+
+    def delete_missing(self):
+        """Удаляет строки, которых нет в файле. Обработчики сигналов
+        удаления, если они включены, обновляют рейтинги, индексы и версии
+        кэшей для каскадно удалённых строк."""
+
+        for chunk in chunks(sorted(self.missing), self.batch_size):
+            deleted = self.model.objects.filter(pk__in=chunk).delete()[1]
+            self.deleted += deleted.get(self.model._meta.label, 0)
+
+    @property
+    def rows(self):
+        return self.loaded + self.updated + self.unchanged
+
+    def describe(self):
+        return (f'добавлено {self.loaded}, обновлено {self.updated}, '
+                f'без изменений {self.unchanged}, '
+                f'отклонено {self.rejected}')
+
+
+def refresh_touched(loaders):
+    """Пересчитывает рейтинги, таблицу лучших и поисковые индексы
+    произведений, затронутых синхронизацией, и меняет версии кэшей
+    изменённых моделей и коллекций. loaders - словарь по моделям."""
+
+    title_ids = set()
+    for model, attname in TITLE_FIELDS.items():
+        if model in loaders:
+            title_ids |= loaders[model].touched.get(attname, set())
+    for chunk in chunks(sorted(title_ids), BATCH_SIZE):
+        titles = Title.objects.filter(pk__in=chunk)
+        titles.refresh_ratings()
+        LeaderboardEntry.objects.rebuild_for(titles)
+    changed = loaders[Title].touched.get('id', ()) if Title in loaders else ()
+    for chunk in chunks(sorted(changed), BATCH_SIZE):
+        titles = list(Title.objects.filter(pk__in=chunk)
+                      .only('pk', 'name', 'description'))
+        index_titles(titles)
+        index_names(titles)
+    for model, loader in loaders.items():
+        if not (loader.loaded or loader.updated):
+            continue
+        bump_version(*DEPENDENT_MODELS[model])
+        for scope in loader.touched.get(SCOPE_FIELDS.get(model), ()):
+            bump_version(model, scope=scope)
+
+
+def parsed_shards(executor, shards, window):
+    """Результаты parse_shard в порядке частей. В обработке не больше
+    window частей, чтобы память не росла с размером файла."""
+
+    pending = deque()
+    for loader, columns, rows in shards:
+        pending.append((loader, executor.submit(
+            parse_shard, loader.model._meta.label, columns, rows
+        )))
+        if len(pending) >= window:
+            loader, future = pending.popleft()
+            yield loader, future.result()
+    while pending:
+        loader, future = pending.popleft()
+        yield loader, future.result()
+
+
+def load_level(loaders, workers):
+    """Загружает файлы моделей одного уровня зависимостей.
+
+    Строки всех файлов по очереди делятся на части по batch_size и
+    разбираются пулом процессов, а вставка выполняется в текущем
+    процессе: SQLite допускает одного писателя, а разбор и проверка
+    строк занимают большую часть времени. Исполнители получают id для
+    проверки внешних ключей при запуске и к БД не обращаются.
+    """
+
+    ids = {}
+    for loader in loaders:
+        for field in loader.model._meta.concrete_fields:
+            if field.is_relation and (field.related_model._meta.label
+                                      not in ids):
+                ids[field.related_model._meta.label] = foreign_key_ids(field)
+    with ProcessPoolExecutor(workers, initializer=init_worker,
+                             initargs=(ids,)) as executor:
+        with transaction.atomic():
+            shards = interleave(*(loader.shards(ids) for loader in loaders))
+            for loader, (values, errors) in parsed_shards(
+                    executor, shards, workers * 2):
+                for line, error in errors:
+                    loader.reject(line, error)
+                loader.insert([(line, loader.model(**fields))
+                               for line, fields in values])
+
+
+def check_consistency(loaders, counts=True):
+    """Проверяет, что загруженные таблицы не ссылаются на отсутствующие
+    строки и, если counts, что в них столько строк, сколько загружено."""
+
+    try:
+        connection.check_constraints(
+            table_names=[loader.model._meta.db_table for loader in loaders]
+        )
+    except IntegrityError as error:
+        raise CommandError(f'Нарушена целостность данных: {error}')
+    if not counts:
+        return
+    for loader in loaders:
+        count = loader.model.objects.count()
+        if count != loader.loaded:
+            raise CommandError(
+                f'{loader.model.__name__}: в таблице {count} строк, '
+                f'загружено {loader.loaded}'
+            )
+
+
+def rebuild_derived_data():
+    """Пересчитывает данные, которые при обычном сохранении обновляют
+    сигналы: рейтинги, таблицу лучших, поисковые индексы и версии
+    кэшей."""
+
+    titles = Title.objects.all()
+    titles.refresh_ratings()
+    LeaderboardEntry.objects.rebuild_for(titles)
+    rebuild_index()
+    rebuild_trigrams()
+    bump_version(*(model for model, _ in FILES))
 
 
 class Command(BaseCommand):
     help = 'Загрузка тестовых записей в БД'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--data-dir', default=DATA_DIR)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--stream', action='store_true',
+            help='Не очищать таблицы и фиксировать каждый пакет вместе с '
+                 'позицией в файле; повторный запуск продолжает загрузку.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Сбросить сохранённые позиции потоковой загрузки.'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Не очищать таблицы: добавить новые строки и обновить '
+                 'изменившиеся, сравнивая файлы с таблицами по id.'
+        )
+        parser.add_argument(
+            '--delete-missing', action='store_true',
+            help='С --upsert удалить строки, которых нет в файлах.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Число процессов для разбора строк; таблицы без '
+                 'зависимостей друг от друга загружаются одновременно.'
+        )
+
+    def write_result(self, loader, elapsed):
+        if getattr(loader, 'resumed_from', 0):
+            self.stdout.write(
+                f'{loader.model.__name__}: продолжено после строки '
+                f'{loader.resumed_from}'
+            )
+        self.stdout.write(
+            f'{loader.model.__name__}: {loader.describe()}, '
+            f'{elapsed:.2f} с, {loader.rows / max(elapsed, 1e-9):.0f} строк/с'
+        )
+
+    def check_options(self, options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пакета должен быть положительным')
+        if options['workers'] < 1:
+            raise CommandError('Число процессов должно быть положительным')
+        if options['workers'] > 1 and options['stream']:
+            raise CommandError('Потоковая загрузка выполняется в одном '
+                               'процессе')
+        if options['upsert'] and (options['workers'] > 1
+                                  or options['stream']):
+            raise CommandError('Синхронизация выполняется без --stream и '
+                               '--workers')
+        if options['delete_missing'] and not options['upsert']:
+            raise CommandError('--delete-missing используется с --upsert')
+
+    def load_files(self, loaders, workers):
+        if workers == 1:
+            for loader in loaders.values():
+                started = time.perf_counter()
+                loader.load()
+                self.write_result(loader, time.perf_counter() - started)
+            return
+        for level in dependency_levels(list(loaders)):
+            started = time.perf_counter()
+            load_level([loaders[model] for model in level], workers)
+            elapsed = time.perf_counter() - started
+            for model in level:
+                self.write_result(loaders[model], elapsed)
+
+    def delete_missing(self, loaders):
+        """Удаляет строки, которых нет в файлах, начиная с зависимых
+        таблиц. Сигналы включены, поэтому обработчики учитывают и
+        каскадно удалённые строки."""
+
+        with transaction.atomic():
+            for model in reversed(list(loaders)):
+                loaders[model].delete_missing()
+        for model, loader in loaders.items():
+            if loader.deleted:
+                self.stdout.write(
+                    f'{model.__name__}: удалено {loader.deleted}'
+                )
+
     def handle(self, *args, **options):
-        load(User, 'static/data/users.csv')
-        load(Category, 'static/data/category.csv')
-        load(Genre, 'static/data/genre.csv')
-        load(Title, 'static/data/titles.csv',
-             [('category', 'category', Category), ])
-        load(GenreTitle, 'static/data/genre_title.csv')
-        load(Review,
-             'static/data/review.csv',
-             [('title', 'title_id', Title),
-              ('author', 'author', User)])
-        load(Comment,
-             'static/data/comments.csv',
-             [('review', 'review_id', Review),
-              ('author', 'author', User)])
+        self.check_options(options)
+        report = self.stderr.write if options['verbosity'] > 1 else None
+        paths = [os.path.join(options['data_dir'], name) for _, name in FILES]
+        if options['restart']:
+            LoadCheckpoint.objects.filter(
+                path__in=[os.path.abspath(path) for path in paths]
+            ).delete()
+        if options['upsert']:
+            loader_class = UpsertLoader
+        elif options['stream']:
+            loader_class = StreamingLoader
+        else:
+            loader_class = Loader
+        loaders = {
+            model: loader_class(model, path, options['batch_size'], report)
+            for (model, _), path in zip(FILES, paths)
+        }
+        total_started = time.perf_counter()
+        with suspended_signals():
+            if not (options['stream'] or options['upsert']):
+                wipe_tables(list(loaders))
+            self.load_files(loaders, options['workers'])
+        if options['delete_missing']:
+            self.delete_missing(loaders)
+        with suspended_signals():
+            check_consistency(loaders.values(), counts=not (
+                options['stream'] or options['upsert']
+            ))
+            started = time.perf_counter()
+            if options['upsert']:
+                refresh_touched(loaders)
+            else:
+                rebuild_derived_data()
+        self.stdout.write(
+            'Рейтинги, таблица лучших и поисковые индексы пересчитаны за '
+            f'{time.perf_counter() - started:.2f} с'
+        )
+        self.stdout.write(
+            f'Всего: {time.perf_counter() - total_started:.2f} с'
+        )
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+from reviews.fuzzy import rebuild_trigrams
+from reviews.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестроение поисковых индексов произведений'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rebuild_index()
+        rebuild_trigrams()
+        self.stdout.write(
+            f'Индекс перестроен за {time.perf_counter() - started:.2f} с'
+        )
@@ -0,0 +1,92 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.models import Title
+
+from api.versions import bump_version
+
+CHUNK_SIZE = 10000
+UPDATE_SQL = (
+    f'UPDATE {Title._meta.db_table} '
+    'SET weighted_rating = %s, updated_at = %s WHERE id = %s'
+)
+
+
+def weighted_ratings(score_sums, review_counts, min_votes):
+    """Байесовская оценка в стиле IMDb для массивов сумм и числа оценок.
+
+    WR = (v * R + m * C) / (v + m) = (S + m * C) / (v + m), где C - средняя
+    оценка по всем отзывам. Для произведений без отзывов возвращается NaN.
+    """
+
+    total_votes = review_counts.sum()
+    if not total_votes:
+        return np.full(len(score_sums), np.nan)
+    mean_score = score_sums.sum() / total_votes
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = ((score_sums + min_votes * mean_score)
+                  / (review_counts + min_votes))
+    result[review_counts == 0] = np.nan
+    return result
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт взвешенного рейтинга всех произведений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-votes', type=float,
+            help='Порог числа отзывов m; по умолчанию берётся квантиль '
+                 'числа отзывов среди оценённых произведений'
+        )
+        parser.add_argument(
+            '--quantile', type=float, default=0.8,
+            help='Квантиль для порога m (по умолчанию 0.8)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if not 0 <= options['quantile'] <= 1:
+            raise CommandError('Квантиль должен быть в диапазоне [0, 1]')
+        started = time.perf_counter()
+        titles = np.array(
+            Title.objects.order_by().values_list(
+                'pk', 'score_sum', 'review_count', 'weighted_rating'
+            ),
+            dtype=np.float64
+        ).reshape(-1, 4)
+        pks, score_sums, review_counts, current = titles.T
+
+        min_votes = options['min_votes']
+        if min_votes is None:
+            rated = review_counts[review_counts > 0]
+            min_votes = (np.quantile(rated, options['quantile'])
+                         if len(rated) else 0)
+        result = weighted_ratings(score_sums, review_counts, min_votes)
+
+        changed = ~np.isclose(result, current, equal_nan=True)
+        values = result[changed].astype(object)
+        values[np.isnan(result[changed])] = None
+        updated_at = connection.ops.adapt_datetimefield_value(
+            timezone.now()
+        )
+        updates = [
+            (value, updated_at, pk) for value, pk in
+            zip(values.tolist(), pks[changed].astype(int).tolist())
+        ]
+        chunk_size = options['chunk_size']
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(updates), chunk_size):
+                cursor.executemany(UPDATE_SQL,
+                                   updates[start:start + chunk_size])
+        if updates:
+            bump_version(Title)
+
+        self.stdout.write(
+            f'Произведений: {len(pks)}, обновлено: {len(updates)}, '
+            f'm = {min_votes:g}, '
+            f'время: {time.perf_counter() - started:.2f} с'
+        )
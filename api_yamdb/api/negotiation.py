@@ -0,0 +1,12 @@
+"""Выбор формата ответа для представлений с единственным форматом."""
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class FirstRendererNegotiation(DefaultContentNegotiation):
+    """Всегда выбирает первый рендерер представления независимо от
+    заголовка Accept и суффикса формата, вместо ответа 406. Разбор тела
+    запроса не меняется."""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderer = renderers[0]
+        return renderer, renderer.media_type
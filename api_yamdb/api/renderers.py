@@ -0,0 +1,93 @@
+"""Быстрый JSON-рендерер.
+
+Если установлен orjson, ответ кодируется им, иначе используется один
+заранее созданный экземпляр JSONEncoder из стандартной библиотеки без
+экранирования не-ASCII символов и с компактными разделителями. Для
+форматированного вывода (?indent, Browsable API) и настроек, отличных
+от настроек DRF по умолчанию, работает обычный JSONRenderer.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Как и JSONRenderer, экранируем U+2028 и U+2029, чтобы ответ оставался
+# корректным JavaScript.
+LINE_SEPARATORS = (('\u2028', '\\u2028'), ('\u2029', '\\u2029'))
+ENCODED_LINE_SEPARATORS = tuple(
+    (separator.encode(), escaped.encode())
+    for separator, escaped in LINE_SEPARATORS
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer с кодированием через orjson или через
+    переиспользуемый кодировщик стандартной библиотеки."""
+
+    use_orjson = orjson is not None
+
+    def __init__(self):
+        self.stdlib_encoder = self.encoder_class(
+            ensure_ascii=False, allow_nan=not self.strict,
+            separators=(',', ':')
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        if self.use_orjson:
+            return self.render_orjson(data)
+        return self.render_stdlib(data)
+
+    def render_orjson(self, data):
+        ret = orjson.dumps(
+            data, default=self.stdlib_encoder.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+        for separator, escaped in ENCODED_LINE_SEPARATORS:
+            if separator in ret:
+                ret = ret.replace(separator, escaped)
+        return ret
+
+    def render_stdlib(self, data):
+        ret = self.stdlib_encoder.encode(data)
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in ret:
+                ret = ret.replace(separator, escaped)
+        return ret.encode()
+
+
+class StdlibJSONRenderer(FastJSONRenderer):
+    """FastJSONRenderer без orjson."""
+
+    use_orjson = False
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """Поток объектов в формате NDJSON: по одному JSON на строку.
+
+    render кодирует одно значение (например, ответ с ошибкой), а поток
+    строк для StreamingHttpResponse возвращает render_lines.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return b''.join(self.render_lines([data]))
+
+    def render_lines(self, items):
+        """Генератор строк NDJSON для итерируемого набора объектов."""
+
+        render = self.render_orjson if self.use_orjson else self.render_stdlib
+        for item in items:
+            yield render(item) + b'\n'
@@ -0,0 +1,49 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.signals import suspendable
+from users.models import User
+
+from .versions import bump_version
+
+DEPENDENT_MODELS = {
+    User: (User,),
+    Category: (Category, Title),
+    Genre: (Genre, Title),
+    Title: (Title,),
+    GenreTitle: (Title,),
+    Review: (Review, Title),
+    Comment: (Comment,),
+}
+SCOPE_FIELDS = {
+    Review: 'title_id',
+    Comment: 'review_id',
+}
+
+
+@suspendable
+def bump_versions_on_write(sender, instance, **kwargs):
+    """Обновляет версии данных, от которых зависят кэши ответов API.
+
+    Запись отзыва меняет и рейтинг произведения, а запись жанра или
+    категории - результаты фильтрации произведений. Для отзывов и
+    комментариев дополнительно меняется версия их родительской коллекции.
+    """
+
+    bump_version(*DEPENDENT_MODELS[sender])
+    if sender in SCOPE_FIELDS:
+        bump_version(sender, scope=getattr(instance, SCOPE_FIELDS[sender]))
+
+
+@suspendable
+def bump_versions_on_genre_change(sender, action, **kwargs):
+    """Учитывает жанры, изменённые через Title.genre: add и set
+    вставляют связи bulk_create без сигналов сохранения."""
+
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version(*DEPENDENT_MODELS[GenreTitle])
+
+
+m2m_changed.connect(bump_versions_on_genre_change, sender=Title.genre.through)
+for model in DEPENDENT_MODELS:
+    post_save.connect(bump_versions_on_write, sender=model)
+    post_delete.connect(bump_versions_on_write, sender=model)
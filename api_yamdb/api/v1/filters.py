@@ -1,13 +1,95 @@
+from django.db.models import Case, Count, IntegerField, When
 from django_filters import rest_framework as filters
-from reviews.models import Title
+from reviews.fuzzy import fuzzy_search
+from reviews.models import Category, GenreTitle, Title
+from reviews.search import search_titles
+
+GENRE_MODE_ANY = 'any'
+GENRE_MODE_ALL = 'all'
+GENRE_MODES = (
+    (GENRE_MODE_ANY, 'Любой из жанров'),
+    (GENRE_MODE_ALL, 'Все жанры'),
+)
+
+
+def order_by_ids(queryset, ids):
+    """Оставляет в выборке произведения из списка в его порядке."""
+
+    if not ids:
+        return queryset.none()
+    ranking = Case(
+        *(When(pk=pk, then=position) for position, pk in enumerate(ids)),
+        output_field=IntegerField()
+    )
+    return queryset.filter(pk__in=ids).order_by(ranking)
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    """Фильтр по списку значений через запятую."""
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(field_name='category__slug')
-    genre = filters.CharFilter(field_name='genre__slug')
+    category = CharInFilter(method='filter_category')
+    genre = CharInFilter(method='filter_genre')
+    genre_mode = filters.ChoiceFilter(choices=GENRE_MODES,
+                                      method='filter_genre_mode')
     name = filters.CharFilter(field_name='name')
     year = filters.NumberFilter(field_name='year')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    rating_min = filters.NumberFilter(field_name='rating', lookup_expr='gte')
+    rating_max = filters.NumberFilter(field_name='rating', lookup_expr='lte')
+    q = filters.CharFilter(method='filter_search')
+    fuzzy = filters.CharFilter(method='filter_fuzzy')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = ('category', 'genre', 'genre_mode', 'name', 'year',
+                  'year_min', 'year_max', 'rating_min', 'rating_max', 'q',
+                  'fuzzy')
+
+    def filter_category(self, queryset, name, value):
+        """Произведения из любой категории списка."""
+
+        return queryset.filter(category__in=Category.objects.filter(
+            slug__in={slug for slug in value if slug}
+        ))
+
+    def filter_genre(self, queryset, name, value):
+        """Произведения с любым или со всеми жанрами из списка.
+
+        Жанры проверяются подзапросом IN по индексу (genre, title)
+        таблицы GenreTitle, поэтому выборка не размножается соединением
+        и не требует DISTINCT.
+        """
+
+        slugs = {slug for slug in value if slug}
+        if not slugs:
+            return queryset
+        links = GenreTitle.objects.filter(genre__slug__in=slugs)
+        if self.form.cleaned_data.get('genre_mode') == GENRE_MODE_ALL:
+            links = (links.values('title_id')
+                     .annotate(genres=Count('id'))
+                     .filter(genres=len(slugs)))
+        return queryset.filter(pk__in=links.values('title_id'))
+
+    def filter_genre_mode(self, queryset, name, value):
+        """Режим применяется в filter_genre."""
+
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию с сортировкой
+        по релевантности.
+
+        Возвращаются только search.MAX_RESULTS лучших совпадений, поэтому
+        TitleViewSet отдаёт такую выборку без поля count.
+        """
+
+        return order_by_ids(queryset, search_titles(value))
+
+    def filter_fuzzy(self, queryset, name, value):
+        """Поиск по названию с опечатками с сортировкой по похожести.
+        Как и ?q=, ограничен fuzzy.MAX_RESULTS лучшими совпадениями."""
+
+        return order_by_ids(queryset, fuzzy_search(value))
@@ -1,4 +1,17 @@
+import hashlib
+
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import mixins, viewsets
+from rest_framework.response import Response
+
+from api.versions import get_version
+
+from .readers import ValuesReader
+
+LIST_KEY = 'list:{label}:{version}:{signature}'
 
 
 class ListCreateDestroyViewSet(mixins.ListModelMixin,
@@ -7,3 +20,112 @@ class ListCreateDestroyViewSet(mixins.ListModelMixin,
                                viewsets.GenericViewSet):
     """Вьюсет, поддерживающий GET(list), POST, DELETE запросы"""
     pass
+
+
+class CachedListMixin:
+    """Кэширует ответ на GET(list) по версии данных модели.
+
+    Ключ включает адрес запроса с отсортированными параметрами, поэтому
+    варианты с ?search= и страницами кэшируются отдельно. Любая запись в
+    модель меняет версию, и старые ответы больше не читаются.
+    """
+
+    def list(self, request, *args, **kwargs):
+        model = self.get_queryset().model
+        query = sorted(request.query_params.lists())
+        signature = hashlib.md5(
+            repr((request.build_absolute_uri(request.path), query)).encode()
+        ).hexdigest()
+        key = LIST_KEY.format(label=model._meta.label_lower,
+                              version=get_version(model),
+                              signature=signature)
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data)
+        return Response(data)
+
+
+class ValuesListMixin:
+    """Отдаёт GET(list) без экземпляров моделей и сериализаторов.
+
+    Страница читается через .values(), а ответ собирает ValuesReader
+    по полям сериализатора, поэтому форма JSON не меняется.
+    """
+
+    def list(self, request, *args, **kwargs):
+        reader = ValuesReader.for_serializer(self.get_serializer())
+        queryset = reader.prepare(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page))
+        return Response(reader.represent(queryset))
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 Not Modified на условные GET-запросы.
+
+    Для объекта ETag и Last-Modified строятся по полю updated_at, которое
+    читается одним запросом по первичному ключу до сериализации; в ETag
+    входит и версия данных модели. Изменения связанных строк, попадающих
+    в ответ, обновляют updated_at в обработчиках reviews.signals. Для
+    коллекции ETag строится по версии данных из кэша.
+    """
+
+    version_models = ()
+    related_version_models = ()
+
+    def get_conditional_queryset(self):
+        """Queryset для чтения updated_at без загрузки родительских
+        объектов."""
+
+        return self.get_queryset()
+
+    def get_parent_queryset(self):
+        """Queryset родительского объекта коллекции или None. Версия
+        коллекции не меняется при удалении родителя, поэтому его
+        наличие проверяется до ответа 304."""
+
+        return None
+
+    def get_list_version(self):
+        return get_version(*self.version_models,
+                           *self.related_version_models)
+
+    def get_etag(self, version):
+        return quote_etag(
+            f'{version}-{self.request.accepted_renderer.format}'
+        )
+
+    def list(self, request, *args, **kwargs):
+        parent = self.get_parent_queryset()
+        if parent is not None and not parent.exists():
+            raise Http404
+        etag = self.get_etag(self.get_list_version())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        updated_at = self.get_conditional_queryset().filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+        etag = self.get_etag(
+            f'{updated_at.timestamp()}-'
+            f'{get_version(*self.version_models)}-'
+            f'{get_version(*self.related_version_models)}'
+        )
+        last_modified = int(updated_at.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
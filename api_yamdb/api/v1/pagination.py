@@ -0,0 +1,118 @@
+import hashlib
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.versions import get_version
+
+COUNT_KEY = 'count:{label}:{version}:{signature}'
+
+
+class PublicationCursorPagination(CursorPagination):
+    """Курсорная пагинация по дате публикации.
+
+    Каждая страница читается диапазоном по индексу (родитель, pub_date, id)
+    без COUNT(*) и OFFSET.
+    """
+
+    ordering = ('-pub_date', '-id')
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, берущий общее число объектов из кэша.
+
+    Ключ строится по SQL запроса без сортировки, то есть по нормализованному
+    набору фильтров, и по версии данных модели, которая меняется при записи.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        try:
+            query = queryset.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        signature = hashlib.md5(repr(query).encode()).hexdigest()
+        key = COUNT_KEY.format(
+            label=queryset.model._meta.label_lower,
+            version=get_version(queryset.model),
+            signature=signature
+        )
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count)
+        return count
+
+
+class CachedCountPagination(PageNumberPagination):
+    """Постраничная пагинация с кэшированным значением count."""
+
+    django_paginator_class = CachedCountPaginator
+
+
+class CountlessPagination(PageNumberPagination):
+    """Постраничная пагинация без COUNT(*).
+
+    Наличие следующей страницы определяется выборкой page_size + 1 строк,
+    поле count в ответе не возвращается.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.request = request
+        page_number = request.query_params.get(self.page_query_param, 1)
+        try:
+            self.page_number = int(page_number)
+            if self.page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message='Invalid page.'
+            ))
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and self.page_number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number,
+                message='That page contains no results'
+            ))
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param,
+                                   self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param,
+                                   self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        del schema['properties']['count']
+        return schema
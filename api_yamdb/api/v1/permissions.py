@@ -24,6 +24,15 @@ class IsAdmin(permissions.BasePermission):
             request.user.is_admin or request.user.is_superuser)
 
 
+class IsModerator(permissions.BasePermission):
+    """Доступ модератору и администратору."""
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.is_moderator or request.user.is_admin
+            or request.user.is_superuser)
+
+
 class IsAuthorModeratorAdminOrReadOnly(permissions.BasePermission):
 
     def has_permission(self, request, view):
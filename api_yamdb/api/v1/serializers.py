@@ -1,8 +1,18 @@
-from django.db.models import Avg
+from django.utils.encoding import smart_str
 from rest_framework import serializers
-from reviews.models import Category, Comment, Genre, Review, Title
+from rest_framework.settings import api_settings
+from reviews.bulk import create_titles
+from reviews.models import (MAX_SCORE, MIN_SCORE, Category, Comment, Genre,
+                            Review, Title)
 from users.models import User
 
+TOP_TITLES_DEFAULT = 10
+TOP_TITLES_LIMIT = 100
+TITLE_RELATIONS = ('genre', 'category')
+MAX_BULK_TITLES = 1000
+MAX_MODERATION_IDS = 1000
+MODERATION_ACTIONS = ('delete', 'hide')
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Сериализация модели User."""
@@ -78,21 +88,69 @@ class GenreSerializer(serializers.ModelSerializer):
 
 
 class TitleReadSerializer(serializers.ModelSerializer):
-    """Сериализация модели Title для чтения"""
+    """Сериализация модели Title для чтения.
+
+    Необязательный аргумент fields оставляет в представлении только
+    перечисленные поля.
+    """
 
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
-    rating = serializers.SerializerMethodField()
 
     class Meta:
         model = Title
-        fields = ('id', 'name', 'year', 'rating',
+        fields = ('id', 'name', 'year', 'rating', 'weighted_rating',
                   'description', 'genre', 'category')
+        read_only_fields = fields
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RatingDistributionSerializer(serializers.ModelSerializer):
+    """Распределение оценок произведения по сохранённым счётчикам."""
 
-    def get_rating(self, obj):
-        score_result = obj.reviews.aggregate(Avg('score'))
-        rating = score_result['score__avg']
-        return rating
+    count = serializers.IntegerField(source='review_count')
+    mean = serializers.FloatField(source='rating')
+    median = serializers.SerializerMethodField()
+    distribution = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = ('id', 'count', 'mean', 'median', 'distribution')
+        read_only_fields = fields
+
+    def get_distribution(self, obj):
+        counts = dict.fromkeys(range(MIN_SCORE, MAX_SCORE + 1), 0)
+        for bucket in obj.rating_buckets.all():
+            counts[bucket.score] = bucket.count
+        return {str(score): count for score, count in counts.items()}
+
+    def get_median(self, obj):
+        if not obj.review_count:
+            return None
+        middle = ((obj.review_count - 1) // 2, obj.review_count // 2)
+        values = []
+        seen = 0
+        for bucket in obj.rating_buckets.all():
+            seen += bucket.count
+            values.extend(
+                bucket.score for position in middle
+                if seen - bucket.count <= position < seen
+            )
+        return sum(values) / len(values)
+
+
+class TopTitlesQuerySerializer(serializers.Serializer):
+    """Параметры запроса списка лучших произведений."""
+
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=TOP_TITLES_LIMIT,
+                                     default=TOP_TITLES_DEFAULT)
 
 
 class TitleWriteSerializer(serializers.ModelSerializer):
@@ -110,6 +168,90 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'year', 'description', 'category', 'genre')
 
 
+class PreloadedSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который ищет объекты в словаре preloaded
+    корневого сериализатора, а не отдельным запросом на каждое
+    значение."""
+
+    def to_internal_value(self, data):
+        preloaded = getattr(self.root, 'preloaded', None)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        if not isinstance(data, str):
+            self.fail('invalid')
+        try:
+            return preloaded[self.queryset.model][data]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+
+
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """Список произведений для массового создания.
+
+    Категории и жанры всех элементов загружаются одним запросом на
+    модель, а произведения и связи с жанрами записываются через
+    bulk_create в одной транзакции. Ошибки возвращаются списком по
+    элементам.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            if len(data) > MAX_BULK_TITLES:
+                raise serializers.ValidationError({
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        'За один запрос можно создать не больше '
+                        f'{MAX_BULK_TITLES} произведений.'
+                    ]
+                })
+            self.preloaded = self.preload(data)
+        return super().to_internal_value(data)
+
+    @staticmethod
+    def preload(data):
+        """Категории и жанры, упомянутые в элементах, по slug.
+
+        Собираются только строковые значения: остальные отклоняет
+        PreloadedSlugRelatedField при валидации элемента.
+        """
+
+        categories, genres = set(), set()
+        for item in data:
+            if not isinstance(item, dict):
+                continue
+            if isinstance(item.get('category'), str):
+                categories.add(item['category'])
+            if isinstance(item.get('genre'), list):
+                genres.update(
+                    slug for slug in item['genre'] if isinstance(slug, str)
+                )
+        return {
+            model: model.objects.in_bulk(slugs, field_name='slug')
+            for model, slugs in ((Category, categories), (Genre, genres))
+        }
+
+    def create(self, validated_data):
+        titles, genre_ids = [], []
+        for item in validated_data:
+            genre_ids.append([genre.pk for genre in item.pop('genre')])
+            titles.append(Title(**item))
+        return create_titles(titles, genre_ids)
+
+
+class TitleBulkSerializer(TitleWriteSerializer):
+    """Элемент массового создания произведений."""
+
+    category = PreloadedSlugRelatedField(
+        queryset=Category.objects.all(), slug_field='slug'
+    )
+    genre = PreloadedSlugRelatedField(
+        queryset=Genre.objects.all(), slug_field='slug', many=True
+    )
+
+    class Meta(TitleWriteSerializer.Meta):
+        list_serializer_class = TitleBulkListSerializer
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализация модели Review."""
 
@@ -147,3 +289,24 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ('id', 'author', 'text',
                   'pub_date')
+
+
+class ModerationSerializer(serializers.Serializer):
+    """Массовое удаление или скрытие отзывов и комментариев по id."""
+
+    action = serializers.ChoiceField(choices=MODERATION_ACTIONS)
+    reviews = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=MAX_MODERATION_IDS, default=list
+    )
+    comments = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=MAX_MODERATION_IDS, default=list
+    )
+
+    def validate(self, data):
+        if not data['reviews'] and not data['comments']:
+            raise serializers.ValidationError(
+                'Укажите id отзывов или комментариев.'
+            )
+        return data
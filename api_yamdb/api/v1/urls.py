@@ -2,8 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, TitleViewSet, UserAuthenticationView,
-                    UserRegistration, UserViewset)
+                    ModerationView, ReviewViewSet, TitleViewSet,
+                    UserAuthenticationView, UserRegistration, UserViewset)
 
 v1_router = SimpleRouter()
 v1_router.register('users', UserViewset, basename='users')
@@ -26,5 +26,6 @@ auth_patterns = [
 
 urlpatterns = [
     path('', include(v1_router.urls)),
+    path('moderation/', ModerationView.as_view()),
     path('auth/', include(auth_patterns))
 ]
@@ -1,25 +1,51 @@
+import hashlib
+
 from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, views, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField
 from rest_framework.generics import get_object_or_404
 from rest_framework.mixins import CreateModelMixin
-from .mixins import ListCreateDestroyViewSet
+from .mixins import (CachedListMixin, ConditionalGetMixin,
+                     ListCreateDestroyViewSet, ValuesListMixin)
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Review, Title
+from reviews.bulk import moderate
+from reviews.models import (Category, Comment, Genre, LeaderboardEntry,
+                            Review, Title)
 from users.models import User
 
+from api.negotiation import FirstRendererNegotiation
+from api.renderers import NDJSONRenderer
+from api.versions import bump_version, get_version
+
 from .filters import TitleFilter
+from .pagination import (CachedCountPagination, CountlessPagination,
+                         PublicationCursorPagination)
 from .permissions import (IsAdmin, IsAdminOrReadOnly,
-                          IsAuthorModeratorAdminOrReadOnly)
-from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, ReviewSerializer,
-                          TitleReadSerializer, TitleWriteSerializer,
+                          IsAuthorModeratorAdminOrReadOnly, IsModerator)
+from .readers import ValuesReader
+from .serializers import (TITLE_RELATIONS, CategorySerializer,
+                          CommentSerializer, GenreSerializer,
+                          ModerationSerializer,
+                          RatingDistributionSerializer, ReviewSerializer,
+                          TitleBulkSerializer, TitleReadSerializer,
+                          TitleWriteSerializer, TopTitlesQuerySerializer,
                           UserMeSerializer, UserSerializer,
                           UserTokenSerializer)
 from .tasks import create_user_send_mail
 
+FACETS_KEY = 'facets:{version}:{signature}'
+EXPORT_CHUNK_SIZE = 500
+READ_ACTIONS = ('list', 'retrieve', 'export')
+SEARCH_PARAMS = frozenset(('q', 'fuzzy'))
+
 
 class UserViewset(viewsets.ModelViewSet):
     """Вьюсет для обработки объектов модели User."""
@@ -30,6 +56,7 @@ class UserViewset(viewsets.ModelViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
     permission_classes = (IsAdmin,)
+    pagination_class = CachedCountPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
 
     @action(
@@ -91,7 +118,7 @@ class UserAuthenticationView(views.APIView):
                         status=status.HTTP_400_BAD_REQUEST)
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(CachedListMixin, ListCreateDestroyViewSet):
     """Вьюсет категорий."""
 
     lookup_field = 'slug'
@@ -100,9 +127,10 @@ class CategoryViewSet(ListCreateDestroyViewSet):
     search_fields = ('name',)
     serializer_class = CategorySerializer
     permission_classes = (IsAdminOrReadOnly,)
+    pagination_class = CachedCountPagination
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(CachedListMixin, ListCreateDestroyViewSet):
     """Вьюсет жанров."""
 
     lookup_field = 'slug'
@@ -111,52 +139,278 @@ class GenreViewSet(ListCreateDestroyViewSet):
     search_fields = ('name',)
     serializer_class = GenreSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    pagination_class = CachedCountPagination
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, ValuesListMixin,
+                   viewsets.ModelViewSet):
     """Вьюсет произведений."""
 
-    queryset = Title.objects.all()
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    )
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ('rating', 'weighted_rating', 'year', 'name')
+    version_models = (Title,)
+    related_version_models = (Category, Genre)
+
+    @property
+    def pagination_class(self):
+        """Поиск ?q= и ?fuzzy= возвращает ограниченное число лучших
+        совпадений, и число найденных произведений для него не равно
+        count: такие выборки листаются без count."""
+
+        if SEARCH_PARAMS & set(self.request.query_params):
+            return CountlessPagination
+        return CachedCountPagination
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.action in READ_ACTIONS:
             return TitleReadSerializer
         return TitleWriteSerializer
 
+    @staticmethod
+    def parse_fields(value):
+        return [name for name in value.split(',') if name]
+
+    @cached_property
+    def title_fields(self):
+        """Поля из ?fields= с добавленными связями из ?expand= или None,
+        если нужно полное представление произведения."""
+
+        params = self.request.query_params
+        if self.action not in READ_ACTIONS or 'fields' not in params:
+            return None
+        fields = self.parse_fields(params['fields'])
+        expand = self.parse_fields(params.get('expand', ''))
+        errors = {}
+        for param, values, allowed in (
+                ('fields', fields, TitleReadSerializer.Meta.fields),
+                ('expand', expand, TITLE_RELATIONS)):
+            unknown = sorted(set(values) - set(allowed))
+            if unknown:
+                errors[param] = f'Неизвестные поля: {", ".join(unknown)}'
+        if not fields and not expand:
+            errors['fields'] = 'Укажите хотя бы одно поле.'
+        if errors:
+            raise ValidationError(errors)
+        return tuple(name for name in TitleReadSerializer.Meta.fields
+                     if name in fields or name in expand)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        """С ?fields= читает только нужные столбцы, а связанные жанры и
+        категорию загружает, только если они запрошены."""
+
+        fields = self.title_fields
+        if fields is None:
+            return super().get_queryset()
+        queryset = Title.objects.all()
+        columns = ['id']
+        columns.extend(name for name in fields if name not in TITLE_RELATIONS)
+        if 'category' in fields:
+            queryset = queryset.select_related('category')
+            columns.extend(('category__name', 'category__slug'))
+        if 'genre' in fields:
+            queryset = queryset.prefetch_related('genre')
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.title_fields is not None:
+            kwargs['fields'] = self.title_fields
+        return super().get_serializer(*args, **kwargs)
+
+    def paginate_queryset(self, queryset):
+        self.filtered_queryset = queryset
+        return super().paginate_queryset(queryset)
+
+    def get_paginated_response(self, data):
+        """С параметром ?facets=true добавляет к странице число
+        произведений по жанрам, категориям и десятилетиям для всей
+        отфильтрованной выборки."""
+
+        response = super().get_paginated_response(data)
+        facets = self.request.query_params.get('facets')
+        if facets in BooleanField.TRUE_VALUES:
+            response.data['facets'] = self.get_facets(self.filtered_queryset)
+        return response
+
+    def get_facets(self, queryset):
+        """Фасеты выборки, закэшированные по её SQL и версии данных."""
+
+        try:
+            query = queryset.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            return queryset.none().facet_counts()
+        key = FACETS_KEY.format(
+            version=get_version(*self.version_models,
+                                *self.related_version_models),
+            signature=hashlib.md5(repr(query).encode()).hexdigest()
+        )
+        facets = cache.get(key)
+        if facets is None:
+            facets = queryset.facet_counts()
+            cache.set(key, facets)
+        return facets
+
+    @action(detail=False, url_path='export',
+            renderer_classes=(NDJSONRenderer,),
+            content_negotiation_class=FirstRendererNegotiation)
+    def export(self, request):
+        """Выгрузка произведений, подходящих под фильтры, в формате
+        NDJSON при любом заголовке Accept. Каталог читается порциями по
+        первичному ключу, жанры порции загружаются одним запросом, а
+        строки отдаются по мере чтения, поэтому память не зависит от
+        размера каталога."""
+
+        reader = ValuesReader.for_serializer(self.get_serializer())
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            request.accepted_renderer.render_lines(
+                reader.iterate(queryset, EXPORT_CHUNK_SIZE)
+            ),
+            content_type=NDJSONRenderer.media_type
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """Создаёт произведения из JSON-массива одной транзакцией: все
+        или ни одного. При ошибках возвращает их списком по элементам."""
+
+        serializer = TitleBulkSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        titles = serializer.save()
+        # bulk_create не отправляет post_save, версии меняются явно.
+        bump_version(Title)
+        reader = ValuesReader.for_serializer(TitleReadSerializer())
+        data = reader.represent(reader.prepare(
+            Title.objects.filter(pk__in=[title.pk for title in titles])
+            .order_by('pk')
+        ))
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, url_path='top')
+    def top(self, request):
+        """Лучшие произведения по рейтингу с фильтрацией по категории
+        и жанру. Чтение ограничено limit записями таблицы лучших."""
+
+        serializer = TopTitlesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        entries = LeaderboardEntry.objects.filter(rating__isnull=False)
+        if 'genre' in params:
+            entries = entries.filter(genre__slug=params['genre'])
+        else:
+            entries = entries.filter(genre__isnull=True)
+        if 'category' in params:
+            entries = entries.filter(category__slug=params['category'])
+        entries = (entries.order_by('-rating', 'title')
+                   .select_related('title__category')
+                   .prefetch_related('title__genre')[:params['limit']])
+        serializer = TitleReadSerializer(
+            [entry.title for entry in entries], many=True
+        )
+        return Response(serializer.data)
+
+    @action(detail=True, url_path='rating-distribution')
+    def rating_distribution(self, request, pk=None):
+        """Распределение оценок произведения по шкале от 1 до 10."""
+
+        title = get_object_or_404(
+            Title.objects.prefetch_related('rating_buckets'), pk=pk
+        )
+        serializer = RatingDistributionSerializer(title)
+        return Response(serializer.data)
+
+
+class ReviewViewSet(ConditionalGetMixin, ValuesListMixin,
+                    viewsets.ModelViewSet):
     """Вьюсет отзывов."""
 
     serializer_class = ReviewSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,
                           IsAuthorModeratorAdminOrReadOnly,)
+    pagination_class = PublicationCursorPagination
+    related_version_models = (User,)
 
     def get_title(self):
         return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.get_title().reviews.filter(is_hidden=False)
+
+    def get_conditional_queryset(self):
+        return Review.objects.filter(title_id=self.kwargs.get('title_id'),
+                                     is_hidden=False)
+
+    def get_parent_queryset(self):
+        return Title.objects.filter(pk=self.kwargs.get('title_id'))
+
+    def get_list_version(self):
+        return (f'{get_version(Review, scope=self.kwargs.get("title_id"))}-'
+                f'{get_version(*self.related_version_models)}')
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user,
                         title=self.get_title())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, ValuesListMixin,
+                     viewsets.ModelViewSet):
     """Вьюсет комментариев."""
 
     serializer_class = CommentSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,
                           IsAuthorModeratorAdminOrReadOnly,)
+    pagination_class = PublicationCursorPagination
+    related_version_models = (User,)
 
     def get_review(self):
-        return get_object_or_404(Review, pk=self.kwargs.get('review_id'))
+        return get_object_or_404(Review, pk=self.kwargs.get('review_id'),
+                                 is_hidden=False)
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.get_review().comments.filter(is_hidden=False)
+
+    def get_conditional_queryset(self):
+        return Comment.objects.filter(review_id=self.kwargs.get('review_id'),
+                                      is_hidden=False)
+
+    def get_parent_queryset(self):
+        return Review.objects.filter(pk=self.kwargs.get('review_id'),
+                                     is_hidden=False)
+
+    def get_list_version(self):
+        return (f'{get_version(Comment, scope=self.kwargs.get("review_id"))}-'
+                f'{get_version(*self.related_version_models)}')
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, review=self.get_review())
+
+
+class ModerationView(views.APIView):
+    """Массовое удаление или скрытие отзывов и комментариев."""
+
+    permission_classes = (IsModerator,)
+
+    def post(self, request):
+        """Удаляет или скрывает отзывы и комментарии по спискам id.
+        Рейтинг каждого затронутого произведения пересчитывается один
+        раз."""
+
+        serializer = ModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        result = moderate(data['reviews'], data['comments'],
+                          hide=data['action'] == 'hide')
+        # Сигналы записи отключены на время операции, версии кэшей
+        # меняются здесь.
+        bump_version(Review, Comment, Title)
+        for title_id in result.title_ids:
+            bump_version(Review, scope=title_id)
+        for review_id in result.review_ids:
+            bump_version(Comment, scope=review_id)
+        return Response({'reviews': result.reviews,
+                         'comments': result.comments},
+                        status=status.HTTP_200_OK)
@@ -0,0 +1,38 @@
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'version:{label}:{scope}'
+
+
+def _key(model, scope):
+    return VERSION_KEY.format(label=model._meta.label_lower, scope=scope)
+
+
+def get_version(*models, scope=''):
+    """Возвращает текущие версии данных моделей одной строкой.
+
+    Версия меняется при любой записи в модель, поэтому её удобно
+    включать в ключи кэша: старые записи просто перестают читаться.
+    scope сужает версию до части данных, например отзывов одного
+    произведения.
+    """
+
+    keys = [_key(model, scope) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns())
+            versions[key] = cache.get(key)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def bump_version(*models, scope=''):
+    """Увеличивает версии данных моделей после записи."""
+
+    for model in models:
+        key = _key(model, scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns())
@@ -0,0 +1,96 @@
+"""Массовая запись произведений и модерация отзывов.
+
+bulk_create и update не отправляют сигналы сохранения, а удаление
+выполняется с отключёнными обработчиками, поэтому таблица лучших,
+рейтинги и поисковые индексы обновляются здесь явно, один раз на весь
+набор. Версии кэшей API меняет вызывающий код.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .fuzzy import index_names
+from .models import (BULK_BATCH_SIZE, Comment, GenreTitle, LeaderboardEntry,
+                     Review, Title)
+from .search import index_titles
+from .signals import suspended_signals
+
+ModerationResult = namedtuple(
+    'ModerationResult', ('reviews', 'comments', 'title_ids', 'review_ids')
+)
+
+
+def bulk_create_titles(titles):
+    """bulk_create с заполнением первичных ключей.
+
+    Django 3.2 не возвращает ключи из SQLite, поэтому они читаются
+    после вставки: у SQLite первичный ключ AUTOINCREMENT, и пока
+    транзакция держит блокировку записи, вставленные строки получают
+    наибольшие ключи таблицы по порядку. Вызывать внутри транзакции.
+    """
+
+    Title.objects.bulk_create(titles, batch_size=BULK_BATCH_SIZE)
+    if titles and titles[-1].pk is None:
+        pks = list(Title.objects.order_by('-pk')
+                   .values_list('pk', flat=True)[:len(titles)])
+        for title, pk in zip(titles, reversed(pks)):
+            title.pk = pk
+    return titles
+
+
+def create_titles(titles, genre_ids):
+    """Сохраняет несохранённые произведения titles и их жанры.
+
+    genre_ids - списки id жанров для каждого произведения по порядку.
+    """
+
+    titles = list(titles)
+    if not titles:
+        return titles
+    with transaction.atomic():
+        bulk_create_titles(titles)
+        links = []
+        for title, title_genre_ids in zip(titles, genre_ids):
+            for genre_id in dict.fromkeys(title_genre_ids):
+                links.append(GenreTitle(title_id=title.pk, genre_id=genre_id))
+        GenreTitle.objects.bulk_create(links, batch_size=BULK_BATCH_SIZE)
+        LeaderboardEntry.objects.rebuild_for(
+            Title.objects.filter(pk__in=[title.pk for title in titles])
+        )
+        index_titles(titles)
+        index_names(titles)
+    return titles
+
+
+def moderate(review_ids, comment_ids, hide=False):
+    """Удаляет или скрывает отзывы и комментарии по id.
+
+    Каскадное удаление комментариев и обновление строк выполняются
+    групповыми запросами, а рейтинг пересчитывается одним вызовом
+    refresh_ratings для всех затронутых произведений. Возвращает число
+    отзывов и комментариев, изменённых по запросу, и id произведений и
+    отзывов, чьи коллекции изменились.
+    """
+
+    reviews = Review.objects.filter(pk__in=review_ids)
+    comments = Comment.objects.filter(pk__in=comment_ids)
+    if hide:
+        reviews = reviews.filter(is_hidden=False)
+        comments = comments.filter(is_hidden=False)
+    with transaction.atomic(), suspended_signals():
+        title_ids = set(reviews.values_list('title_id', flat=True))
+        changed_review_ids = set(
+            comments.values_list('review_id', flat=True)
+        ).union(reviews.values_list('pk', flat=True))
+        if hide:
+            now = timezone.now()
+            review_count = reviews.update(is_hidden=True, updated_at=now)
+            comment_count = comments.update(is_hidden=True, updated_at=now)
+        else:
+            comment_count = comments.delete()[0]
+            review_count = reviews.delete()[1].get(Review._meta.label, 0)
+        if title_ids:
+            Title.objects.filter(pk__in=title_ids).refresh_ratings()
+    return ModerationResult(review_count, comment_count, title_ids,
+                            changed_review_ids)
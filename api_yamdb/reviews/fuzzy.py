@@ -0,0 +1,211 @@
+"""Нечёткий поиск по названиям произведений.
+
+Название раскладывается на триграммы так же, как в pg_trgm: каждое
+слово дополняется двумя пробелами слева и одним справа. Вхождения
+триграмм хранятся в таблице TrigramPosting. Кандидаты отбираются в
+памяти по самым редким триграммам запроса: название с похожестью не
+ниже порога обязано содержать хотя бы одну из них. Точная похожесть
+считается только для кандидатов, а не для всего каталога.
+"""
+import math
+from collections import Counter
+
+from django.db import connection, transaction
+
+from .models import Title, Trigram, TrigramPosting
+from .search import BATCH_SIZE, TOKEN_RE, normalize
+
+SIMILARITY_THRESHOLD = 0.3
+MAX_CANDIDATES = 10000
+MAX_RESULTS = 1000
+INSERT_POSTING_SQL = (
+    f'INSERT INTO {TrigramPosting._meta.db_table} (trigram_id, title_id) '
+    'VALUES (%s, %s)'
+)
+UPDATE_COUNT_SQL = (
+    f'UPDATE {Trigram._meta.db_table} SET document_count = %s WHERE id = %s'
+)
+SHIFT_COUNT_SQL = (
+    f'UPDATE {Trigram._meta.db_table} '
+    'SET document_count = document_count + %s WHERE id = %s'
+)
+
+
+def trigrams(text):
+    """Множество триграмм слов текста."""
+
+    result = set()
+    for word in TOKEN_RE.findall(normalize(text or '')):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def similarity(first, second):
+    """Доля общих триграмм двух множеств (коэффициент Жаккара)."""
+
+    common = len(first & second)
+    if not common:
+        return 0.0
+    return common / (len(first) + len(second) - common)
+
+
+def _shift_counts(deltas):
+    """Сдвигает число документов триграмм одним executemany."""
+
+    if not deltas:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(SHIFT_COUNT_SQL, [
+            (delta, trigram_id) for trigram_id, delta in deltas.items()
+        ])
+
+
+def _get_trigrams(values):
+    """Возвращает id триграмм, создавая отсутствующие."""
+
+    found = dict(Trigram.objects.filter(trigram__in=values)
+                 .values_list('trigram', 'pk'))
+    missing = [value for value in values if value not in found]
+    if missing:
+        Trigram.objects.bulk_create(
+            [Trigram(trigram=value) for value in missing],
+            ignore_conflicts=True
+        )
+        found.update(Trigram.objects.filter(trigram__in=missing)
+                     .values_list('trigram', 'pk'))
+    return found
+
+
+def unindex_names(title_ids):
+    """Убирает названия произведений из триграммного индекса."""
+
+    postings = TrigramPosting.objects.filter(title_id__in=title_ids)
+    removed = Counter(postings.values_list('trigram_id', flat=True))
+    if not removed:
+        return
+    _shift_counts({
+        trigram_id: -count for trigram_id, count in removed.items()
+    })
+    postings.delete()
+
+
+def index_names(titles):
+    """Добавляет или переиндексирует названия произведений."""
+
+    titles = list(titles)
+    if not titles:
+        return
+    with transaction.atomic():
+        unindex_names([title.pk for title in titles])
+        documents = {title.pk: trigrams(title.name) for title in titles}
+        values = sorted(set().union(*documents.values()))
+        trigram_ids = {}
+        for start in range(0, len(values), BATCH_SIZE):
+            trigram_ids.update(_get_trigrams(values[start:start + BATCH_SIZE]))
+        added = Counter()
+        postings = []
+        for title_id, document in documents.items():
+            for value in document:
+                added[trigram_ids[value]] += 1
+                postings.append(TrigramPosting(
+                    trigram_id=trigram_ids[value], title_id=title_id
+                ))
+        TrigramPosting.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+        _shift_counts(added)
+
+
+def rebuild_trigrams(chunk_size=10000):
+    """Полностью перестраивает триграммный индекс.
+
+    Вхождения вставляются через executemany, а число документов для
+    каждой триграммы копится в памяти и записывается один раз.
+    """
+
+    added = Counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        TrigramPosting.objects.all().delete()
+        Trigram.objects.all().delete()
+        trigram_ids = {}
+        titles = Title.objects.order_by('pk').values_list('pk', 'name')
+        last_pk = 0
+        while True:
+            chunk = list(titles.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            documents = [(pk, trigrams(name)) for pk, name in chunk]
+            missing = sorted(
+                set().union(*(document for _, document in documents))
+                - trigram_ids.keys()
+            )
+            for start in range(0, len(missing), BATCH_SIZE):
+                trigram_ids.update(
+                    _get_trigrams(missing[start:start + BATCH_SIZE])
+                )
+            postings = []
+            for pk, document in documents:
+                for value in document:
+                    trigram_id = trigram_ids[value]
+                    added[trigram_id] += 1
+                    postings.append((trigram_id, pk))
+            cursor.executemany(INSERT_POSTING_SQL, postings)
+            last_pk = chunk[-1][0]
+        cursor.executemany(
+            UPDATE_COUNT_SQL,
+            [(count, trigram_id) for trigram_id, count in added.items()]
+        )
+
+
+def fuzzy_search(query, limit=MAX_RESULTS,
+                 threshold=SIMILARITY_THRESHOLD):
+    """Возвращает id произведений с названием, похожим на запрос,
+    в порядке убывания похожести."""
+
+    query_trigrams = trigrams(query)
+    if not query_trigrams:
+        return []
+    known = {
+        value: (pk, count) for value, pk, count in
+        Trigram.objects.filter(trigram__in=query_trigrams,
+                               document_count__gt=0)
+        .values_list('trigram', 'pk', 'document_count')
+    }
+    # Похожесть не ниже порога требует не менее min_overlap общих
+    # триграмм, поэтому кандидат содержит хотя бы одну из
+    # len - min_overlap + 1 самых редких триграмм запроса.
+    min_overlap = math.ceil(threshold * len(query_trigrams) - 1e-9)
+    ordered = [
+        known[value][0] for value in sorted(
+            query_trigrams,
+            key=lambda value: (known.get(value, (None, 0))[1], value)
+        ) if value in known
+    ]
+    prefix_size = len(query_trigrams) - min_overlap + 1 - (
+        len(query_trigrams) - len(known)
+    )
+    if prefix_size <= 0:
+        return []
+    prefix_ids, rest_ids = ordered[:prefix_size], ordered[prefix_size:]
+    overlaps = Counter(
+        TrigramPosting.objects.filter(trigram_id__in=prefix_ids)
+        .values_list('title_id', flat=True)
+    )
+    candidate_ids = [pk for pk, _ in overlaps.most_common(MAX_CANDIDATES)]
+    scores = {}
+    for start in range(0, len(candidate_ids), BATCH_SIZE):
+        batch = candidate_ids[start:start + BATCH_SIZE]
+        if rest_ids:
+            overlaps.update(
+                TrigramPosting.objects.filter(
+                    trigram_id__in=rest_ids, title_id__in=batch
+                ).values_list('title_id', flat=True)
+            )
+        names = Title.objects.filter(
+            pk__in=[pk for pk in batch if overlaps[pk] >= min_overlap]
+        ).values_list('pk', 'name')
+        for pk, name in names:
+            score = similarity(query_trigrams, trigrams(name))
+            if score >= threshold:
+                scores[pk] = score
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [pk for pk, _ in ranked[:limit]]
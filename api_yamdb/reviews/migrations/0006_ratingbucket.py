@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 20:20
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_rating_buckets(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    RatingBucket = apps.get_model('reviews', 'RatingBucket')
+    RatingBucket.objects.bulk_create(
+        RatingBucket(title_id=row['title'], score=row['score'],
+                     count=row['count'])
+        for row in Review.objects.order_by().values('title', 'score')
+        .annotate(count=Count('id'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_rating_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField(verbose_name='Оценка')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_buckets', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Счётчик оценки',
+                'verbose_name_plural': 'Счётчики оценок',
+                'ordering': ('score',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ratingbucket',
+            constraint=models.UniqueConstraint(fields=('title', 'score'), name='unique_title_score'),
+        ),
+        migrations.RunPython(fill_rating_buckets, migrations.RunPython.noop),
+    ]
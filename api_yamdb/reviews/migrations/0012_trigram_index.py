@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-18 20:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3, unique=True)),
+                ('document_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Триграмма',
+                'verbose_name_plural': 'Триграммы',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrigramPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigram_postings', to='reviews.title')),
+                ('trigram', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='postings', to='reviews.trigram')),
+            ],
+            options={
+                'verbose_name': 'Вхождение триграммы',
+                'verbose_name_plural': 'Вхождения триграмм',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trigramposting',
+            constraint=models.UniqueConstraint(fields=('trigram', 'title'), name='unique_trigram_posting'),
+        ),
+    ]
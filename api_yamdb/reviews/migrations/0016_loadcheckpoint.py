@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 21:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_review_comment_is_hidden'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoadCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=1024, unique=True, verbose_name='Файл')),
+                ('offset', models.PositiveBigIntegerField(default=0, verbose_name='Смещение в байтах')),
+                ('line', models.PositiveBigIntegerField(default=0, verbose_name='Номер строки')),
+                ('loaded', models.PositiveBigIntegerField(default=0, verbose_name='Загружено строк')),
+                ('rejected', models.PositiveBigIntegerField(default=0, verbose_name='Отклонено строк')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Позиция загрузки',
+                'verbose_name_plural': 'Позиции загрузки',
+            },
+        ),
+    ]
@@ -1,11 +1,19 @@
 import datetime as dt
 
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import (Count, ExpressionWrapper, F, FloatField,
+                              IntegerField, OuterRef, Subquery, Sum)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
 from users.models import User
 
 
 NUMBER_OF_SYMBOLS = 15
+DECADE = 10
+MIN_SCORE = 1
+MAX_SCORE = 10
+BULK_BATCH_SIZE = 1000
 
 
 class Category(models.Model):
@@ -43,6 +51,103 @@ class Genre(models.Model):
         return self.name[:NUMBER_OF_SYMBOLS]
 
 
+def rating_expression(score_sum, review_count):
+    """Выражение для средней оценки: None, если отзывов нет."""
+
+    return ExpressionWrapper(
+        Cast(score_sum, FloatField()) / NullIf(review_count, 0),
+        output_field=FloatField()
+    )
+
+
+class TitleQuerySet(models.QuerySet):
+    """Запросы для поддержки хранимого рейтинга и фасетов произведений."""
+
+    def shift_rating(self, score_delta, count_delta):
+        """Атомарно сдвигает сумму оценок и число отзывов."""
+
+        updated = self.update(
+            score_sum=F('score_sum') + score_delta,
+            review_count=F('review_count') + count_delta,
+            rating=rating_expression(F('score_sum') + score_delta,
+                                     F('review_count') + count_delta),
+            updated_at=timezone.now()
+        )
+        LeaderboardEntry.objects.filter(title__in=self).sync_ratings()
+        return updated
+
+    def refresh_ratings(self):
+        """Пересчитывает рейтинг и распределение оценок по таблице отзывов
+        набором групповых запросов. Скрытые отзывы не учитываются."""
+
+        visible = Review.objects.filter(is_hidden=False)
+        reviews = (visible.filter(title=OuterRef('pk'))
+                   .order_by().values('title'))
+        with transaction.atomic():
+            RatingBucket.objects.filter(title__in=self).delete()
+            RatingBucket.objects.bulk_create(
+                RatingBucket(title_id=row['title'], score=row['score'],
+                             count=row['count'])
+                for row in visible.filter(title__in=self)
+                .order_by().values('title', 'score')
+                .annotate(count=Count('id'))
+            )
+            self.update(
+                score_sum=Coalesce(
+                    Subquery(reviews.annotate(total=Sum('score'))
+                             .values('total')), 0),
+                review_count=Coalesce(
+                    Subquery(reviews.annotate(total=Count('id'))
+                             .values('total')), 0)
+            )
+            updated = self.update(
+                rating=rating_expression(F('score_sum'), F('review_count')),
+                updated_at=timezone.now()
+            )
+            LeaderboardEntry.objects.filter(title__in=self).sync_ratings()
+        return updated
+
+    def facet_counts(self):
+        """Число произведений выборки по жанрам, категориям и десятилетиям.
+
+        Каждый фасет считается одним групповым запросом, независимо от
+        числа значений.
+        """
+
+        titles = self.order_by().prefetch_related(None)
+        genres = (
+            GenreTitle.objects.filter(title__in=titles.values('pk'))
+            .values_list('genre__slug', 'genre__name')
+            .annotate(count=Count('id'))
+        )
+        categories = (
+            titles.filter(category__isnull=False)
+            .values_list('category__slug', 'category__name')
+            .annotate(count=Count('id'))
+        )
+        decades = (
+            titles.values_list(ExpressionWrapper(
+                F('year') / DECADE * DECADE, output_field=IntegerField()
+            )).annotate(count=Count('id'))
+        )
+        return {
+            'genre': [
+                {'slug': slug, 'name': name, 'count': count}
+                for slug, name, count in sorted(
+                    genres, key=lambda row: (-row[2], row[0]))
+            ],
+            'category': [
+                {'slug': slug, 'name': name, 'count': count}
+                for slug, name, count in sorted(
+                    categories, key=lambda row: (-row[2], row[0]))
+            ],
+            'decade': [
+                {'decade': decade, 'count': count}
+                for decade, count in sorted(decades, reverse=True)
+            ],
+        }
+
+
 class Title(models.Model):
     """Модель произведений."""
 
@@ -67,10 +172,42 @@ class Title(models.Model):
         verbose_name='Год создания',
         validators=[MaxValueValidator(dt.datetime.now().year)]
     )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок'
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+    rating = models.FloatField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='Рейтинг'
+    )
+    weighted_rating = models.FloatField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='Взвешенный рейтинг'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['category', 'year'],
+                         name='title_category_year'),
+            models.Index(fields=['year'], name='title_year'),
+            models.Index(fields=['name'], name='title_name'),
+        ]
 
     def __str__(self):
         return self.name[:NUMBER_OF_SYMBOLS]
@@ -87,11 +224,92 @@ class GenreTitle(models.Model):
             models.UniqueConstraint(fields=['genre', 'title'],
                                     name='unique_genre_title_records')
         ]
+        indexes = [
+            models.Index(fields=['title', 'genre'],
+                         name='genretitle_title_genre'),
+        ]
 
     def __str__(self):
         return f'{self.genre} {self.title}'
 
 
+class LeaderboardEntryQuerySet(models.QuerySet):
+    """Запросы для поддержки таблицы лучших произведений."""
+
+    def sync_ratings(self):
+        """Копирует в записи текущий рейтинг их произведений."""
+
+        return self.update(rating=Subquery(
+            Title.objects.filter(pk=OuterRef('title')).values('rating')[:1]
+        ))
+
+    def rebuild_for(self, titles):
+        """Пересоздаёт записи для произведений из queryset titles:
+        общую запись и по одной на каждый жанр произведения."""
+
+        genres = {}
+        for title_id, genre_id in (GenreTitle.objects
+                                   .filter(title__in=titles)
+                                   .values_list('title_id', 'genre_id')):
+            genres.setdefault(title_id, []).append(genre_id)
+        entries = []
+        for title_id, category_id, rating in (
+                titles.order_by()
+                .values_list('pk', 'category_id', 'rating').iterator()):
+            for genre_id in [None, *genres.get(title_id, ())]:
+                entries.append(self.model(
+                    title_id=title_id, genre_id=genre_id,
+                    category_id=category_id, rating=rating
+                ))
+        with transaction.atomic():
+            self.filter(title__in=titles).delete()
+            self.bulk_create(entries, batch_size=BULK_BATCH_SIZE)
+
+
+class LeaderboardEntry(models.Model):
+    """Запись таблицы лучших произведений в разрезе категории и жанра.
+
+    Запись без жанра участвует в рейтинге по всем жанрам.
+    """
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        verbose_name='Произведение'
+    )
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+        verbose_name='Жанр'
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+',
+        verbose_name='Категория'
+    )
+    rating = models.FloatField(null=True, verbose_name='Рейтинг')
+
+    objects = LeaderboardEntryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Запись таблицы лучших'
+        verbose_name_plural = 'Таблица лучших'
+        indexes = [
+            models.Index(fields=['genre', 'category', '-rating', 'title'],
+                         name='leaderboard_genre_category'),
+            models.Index(fields=['genre', '-rating', 'title'],
+                         name='leaderboard_genre'),
+        ]
+
+    def __str__(self):
+        return f'{self.title} {self.rating}'
+
+
 class Review(models.Model):
     """Модель отзывов."""
 
@@ -110,13 +328,21 @@ class Review(models.Model):
     text = models.TextField(verbose_name='Отзыв')
     score = models.IntegerField(
         verbose_name='Рейтинг',
-        validators=[MinValueValidator(1),
-                    MaxValueValidator(10)]
+        validators=[MinValueValidator(MIN_SCORE),
+                    MaxValueValidator(MAX_SCORE)]
     )
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+    is_hidden = models.BooleanField(
+        default=False,
+        verbose_name='Скрыт модератором'
+    )
 
     class Meta:
         ordering = ('-pub_date',)
@@ -126,10 +352,70 @@ class Review(models.Model):
             models.UniqueConstraint(fields=['author', 'title'],
                                     name='unique_review')
         ]
+        indexes = [
+            models.Index(fields=['title', 'pub_date', 'id'],
+                         name='review_title_pub_date'),
+        ]
 
     def __str__(self):
         return self.text[:NUMBER_OF_SYMBOLS]
 
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв в одной транзакции с пересчётом рейтинга."""
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class RatingBucketQuerySet(models.QuerySet):
+    """Запросы для счётчиков распределения оценок."""
+
+    def shift(self, title_id, score, delta):
+        """Атомарно изменяет счётчик оценки score у произведения."""
+
+        updated = self.filter(title_id=title_id, score=score).update(
+            count=F('count') + delta
+        )
+        if updated or delta <= 0:
+            return
+        try:
+            with transaction.atomic():
+                self.create(title_id=title_id, score=score, count=delta)
+        except IntegrityError:
+            self.filter(title_id=title_id, score=score).update(
+                count=F('count') + delta
+            )
+
+
+class RatingBucket(models.Model):
+    """Число отзывов с определённой оценкой у произведения."""
+
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='rating_buckets',
+        verbose_name='Произведение'
+    )
+    score = models.PositiveSmallIntegerField(verbose_name='Оценка')
+    count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+
+    objects = RatingBucketQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('score',)
+        verbose_name = 'Счётчик оценки'
+        verbose_name_plural = 'Счётчики оценок'
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'score'],
+                                    name='unique_title_score')
+        ]
+
+    def __str__(self):
+        return f'{self.title} {self.score}: {self.count}'
+
 
 class Comment(models.Model):
     """Модель комментариев."""
@@ -150,11 +436,161 @@ class Comment(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+    is_hidden = models.BooleanField(
+        default=False,
+        verbose_name='Скрыт модератором'
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name_plural = 'Комментарии'
         verbose_name = 'Комментарий'
+        indexes = [
+            models.Index(fields=['review', 'pub_date', 'id'],
+                         name='comment_review_pub_date'),
+        ]
 
     def __str__(self):
         return self.text[:NUMBER_OF_SYMBOLS]
+
+
+class SearchCorpus(models.Model):
+    """Статистика полнотекстового индекса: число документов и их
+    суммарная длина в термах."""
+
+    SINGLETON_ID = 1
+
+    documents = models.PositiveIntegerField(default=0)
+    total_length = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Статистика поискового индекса'
+        verbose_name_plural = 'Статистика поискового индекса'
+
+    def __str__(self):
+        return f'{self.documents} {self.total_length}'
+
+
+class SearchTerm(models.Model):
+    """Терм полнотекстового индекса."""
+
+    term = models.CharField(max_length=64, unique=True)
+    document_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Терм поискового индекса'
+        verbose_name_plural = 'Термы поискового индекса'
+
+    def __str__(self):
+        return self.term
+
+
+class SearchPosting(models.Model):
+    """Вхождение терма в название или описание произведения."""
+
+    term = models.ForeignKey(
+        SearchTerm,
+        on_delete=models.CASCADE,
+        related_name='postings'
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='search_postings'
+    )
+    frequency = models.PositiveIntegerField()
+    document_length = models.PositiveIntegerField()
+
+    class Meta:
+        verbose_name = 'Вхождение терма'
+        verbose_name_plural = 'Вхождения термов'
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'title'],
+                                    name='unique_search_posting')
+        ]
+
+    def __str__(self):
+        return f'{self.term} {self.title}'
+
+
+class Trigram(models.Model):
+    """Триграмма названий произведений."""
+
+    trigram = models.CharField(max_length=3, unique=True)
+    document_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Триграмма'
+        verbose_name_plural = 'Триграммы'
+
+    def __str__(self):
+        return self.trigram
+
+
+class TrigramPosting(models.Model):
+    """Вхождение триграммы в название произведения."""
+
+    trigram = models.ForeignKey(
+        Trigram,
+        on_delete=models.CASCADE,
+        related_name='postings'
+    )
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='trigram_postings'
+    )
+
+    class Meta:
+        verbose_name = 'Вхождение триграммы'
+        verbose_name_plural = 'Вхождения триграмм'
+        constraints = [
+            models.UniqueConstraint(fields=['trigram', 'title'],
+                                    name='unique_trigram_posting')
+        ]
+
+    def __str__(self):
+        return f'{self.trigram} {self.title}'
+
+
+class LoadCheckpoint(models.Model):
+    """Позиция потоковой загрузки CSV-файла командой load.
+
+    Обновляется в одной транзакции со вставкой пакета строк, поэтому
+    после прерывания загрузка продолжается ровно с первой
+    незафиксированной строки.
+    """
+
+    path = models.CharField(max_length=1024, unique=True,
+                            verbose_name='Файл')
+    offset = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Смещение в байтах'
+    )
+    line = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Номер строки'
+    )
+    loaded = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Загружено строк'
+    )
+    rejected = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Отклонено строк'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+
+    class Meta:
+        verbose_name = 'Позиция загрузки'
+        verbose_name_plural = 'Позиции загрузки'
+
+    def __str__(self):
+        return f'{self.path}:{self.line}'
@@ -0,0 +1,252 @@
+"""Полнотекстовый поиск по названиям и описаниям произведений.
+
+Инвертированный индекс хранится в таблицах SearchTerm (термы и число
+документов с ними), SearchPosting (вхождения термов в произведения) и
+SearchCorpus (число проиндексированных документов и их суммарная длина).
+Индекс обновляется при сохранении и удалении произведения, а запрос
+ранжируется по BM25 и читает только списки вхождений своих термов.
+"""
+import math
+import re
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import SearchCorpus, SearchPosting, SearchTerm, Title
+
+TOKEN_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile(r'^[а-я]+$')
+MAX_TERM_LENGTH = 64
+MIN_STEM_LENGTH = 3
+NAME_WEIGHT = 2
+MAX_PREFIX_TERMS = 50
+MAX_RESULTS = 1000
+BATCH_SIZE = 900
+K1 = 1.2
+B = 0.75
+SHIFT_COUNT_SQL = (
+    f'UPDATE {SearchTerm._meta.db_table} '
+    'SET document_count = document_count + %s WHERE id = %s'
+)
+
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'в', 'во', 'вот', 'все', 'всё', 'да', 'для', 'до',
+    'его', 'ее', 'её', 'если', 'же', 'за', 'и', 'из', 'или', 'к', 'как',
+    'ко', 'ли', 'на', 'над', 'не', 'нет', 'ни', 'но', 'о', 'об', 'от',
+    'по', 'под', 'при', 'про', 'с', 'со', 'так', 'то', 'у', 'что', 'это',
+    'a', 'an', 'and', 'in', 'of', 'on', 'the', 'to',
+))
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ых',
+    'их', 'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ую',
+    'юю', 'ом', 'ем', 'ам', 'ям', 'ах', 'ях', 'ов', 'ев', 'ию', 'ия', 'ть',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь',
+), key=len, reverse=True)
+
+
+def normalize(text):
+    """Приводит текст к нижнему регистру и заменяет ё на е."""
+
+    return text.lower().replace('ё', 'е')
+
+
+def stem(token):
+    """Отбрасывает русское окончание, оставляя основу не короче
+    MIN_STEM_LENGTH символов."""
+
+    if not CYRILLIC_RE.match(token):
+        return token
+    for ending in ENDINGS:
+        if (token.endswith(ending)
+                and len(token) - len(ending) >= MIN_STEM_LENGTH):
+            return token[:-len(ending)]
+    return token
+
+
+def tokenize(text):
+    """Разбивает текст на нормализованные основы без стоп-слов."""
+
+    return [
+        stem(token)[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(normalize(text or ''))
+        if token not in STOP_WORDS
+    ]
+
+
+def document_terms(name, description):
+    """Частоты термов документа с повышенным весом названия."""
+
+    frequencies = Counter(tokenize(description))
+    for term in tokenize(name):
+        frequencies[term] += NAME_WEIGHT
+    return frequencies
+
+
+def _shift_counts(deltas):
+    """Сдвигает число документов термов одним executemany."""
+
+    if not deltas:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(SHIFT_COUNT_SQL, [
+            (delta, term_id) for term_id, delta in deltas.items()
+        ])
+
+
+def _get_terms(words):
+    """Возвращает id термов, создавая отсутствующие."""
+
+    terms = dict(SearchTerm.objects.filter(term__in=words)
+                 .values_list('term', 'pk'))
+    missing = [word for word in words if word not in terms]
+    if missing:
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=word) for word in missing],
+            ignore_conflicts=True
+        )
+        terms.update(SearchTerm.objects.filter(term__in=missing)
+                     .values_list('term', 'pk'))
+    return terms
+
+
+def unindex_titles(title_ids):
+    """Убирает произведения из индекса и корректирует статистику."""
+
+    postings = SearchPosting.objects.filter(title_id__in=title_ids)
+    removed = Counter()
+    lengths = {}
+    for term_id, title_id, length in postings.values_list(
+            'term_id', 'title_id', 'document_length'):
+        removed[term_id] += 1
+        lengths[title_id] = length
+    if not lengths:
+        return
+    _shift_counts({term_id: -count for term_id, count in removed.items()})
+    postings.delete()
+    SearchCorpus.objects.filter(pk=SearchCorpus.SINGLETON_ID).update(
+        documents=F('documents') - len(lengths),
+        total_length=F('total_length') - sum(lengths.values())
+    )
+
+
+def index_titles(titles):
+    """Добавляет или переиндексирует произведения из итерируемого
+    набора объектов с полями pk, name и description."""
+
+    titles = list(titles)
+    if not titles:
+        return
+    with transaction.atomic():
+        SearchCorpus.objects.get_or_create(pk=SearchCorpus.SINGLETON_ID)
+        unindex_titles([title.pk for title in titles])
+        documents = {
+            title.pk: document_terms(title.name, title.description)
+            for title in titles
+        }
+        words = {word for terms in documents.values() for word in terms}
+        term_ids = {}
+        words = sorted(words)
+        for start in range(0, len(words), BATCH_SIZE):
+            term_ids.update(_get_terms(words[start:start + BATCH_SIZE]))
+        postings = []
+        added = Counter()
+        total_length = 0
+        indexed = 0
+        for title_id, terms in documents.items():
+            if not terms:
+                continue
+            length = sum(terms.values())
+            total_length += length
+            indexed += 1
+            for word, frequency in terms.items():
+                added[term_ids[word]] += 1
+                postings.append(SearchPosting(
+                    term_id=term_ids[word], title_id=title_id,
+                    frequency=frequency, document_length=length
+                ))
+        SearchPosting.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+        _shift_counts(added)
+        SearchCorpus.objects.filter(pk=SearchCorpus.SINGLETON_ID).update(
+            documents=F('documents') + indexed,
+            total_length=F('total_length') + total_length
+        )
+
+
+def rebuild_index(chunk_size=10000):
+    """Полностью перестраивает индекс по всем произведениям."""
+
+    with transaction.atomic():
+        SearchPosting.objects.all().delete()
+        SearchTerm.objects.all().delete()
+        SearchCorpus.objects.all().delete()
+        titles = Title.objects.only('name', 'description').order_by('pk')
+        last_pk = 0
+        while True:
+            chunk = list(titles.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            index_titles(chunk)
+            last_pk = chunk[-1].pk
+
+
+def _expand(word):
+    """Термы индекса, совпадающие со словом запроса или начинающиеся
+    с него: диапазон по уникальному индексу term. Из продолжений слова
+    берутся MAX_PREFIX_TERMS самых частых."""
+
+    terms = SearchTerm.objects.filter(document_count__gt=0)
+    expanded = dict(terms.filter(term=word)
+                    .values_list('pk', 'document_count'))
+    expanded.update(
+        terms.filter(term__gt=word, term__lt=word + '\uffff')
+        .order_by('-document_count')
+        .values_list('pk', 'document_count')[:MAX_PREFIX_TERMS]
+    )
+    return expanded
+
+
+def search_titles(query, limit=MAX_RESULTS):
+    """Возвращает id произведений, содержащих все слова запроса,
+    в порядке убывания релевантности BM25."""
+
+    words = list(dict.fromkeys(tokenize(query)))
+    corpus = SearchCorpus.objects.filter(
+        pk=SearchCorpus.SINGLETON_ID
+    ).first()
+    if not words or corpus is None or not corpus.documents:
+        return []
+    average_length = corpus.total_length / corpus.documents
+    expanded = sorted(
+        (_expand(word) for word in words),
+        key=lambda terms: sum(terms.values())
+    )
+    scores = None
+    for terms in expanded:
+        if not terms:
+            return []
+        postings = SearchPosting.objects.filter(term_id__in=terms)
+        if scores is not None and len(scores) <= BATCH_SIZE:
+            postings = postings.filter(title_id__in=list(scores))
+        word_scores = {}
+        for term_id, title_id, frequency, length in postings.values_list(
+                'term_id', 'title_id', 'frequency', 'document_length'):
+            document_count = terms[term_id]
+            idf = math.log(1 + (corpus.documents - document_count + 0.5)
+                           / (document_count + 0.5))
+            score = idf * frequency * (K1 + 1) / (
+                frequency + K1 * (1 - B + B * length / average_length)
+            )
+            word_scores[title_id] = max(word_scores.get(title_id, 0), score)
+        if scores is None:
+            scores = word_scores
+        else:
+            scores = {
+                title_id: scores[title_id] + score
+                for title_id, score in word_scores.items()
+                if title_id in scores
+            }
+        if not scores:
+            return []
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [title_id for title_id, _ in ranked[:limit]]
@@ -0,0 +1,229 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+from users.models import User
+
+from .models import (Category, Comment, Genre, GenreTitle, LeaderboardEntry,
+                     RatingBucket, Review, Title)
+from .fuzzy import index_names, unindex_names
+from .search import index_titles, unindex_titles
+
+SUSPENDED = ContextVar('signals_suspended', default=False)
+
+
+@contextmanager
+def suspended_signals():
+    """Отключает обработчики, помеченные suspendable, в текущем
+    контексте. Массовые операции сами обновляют производные данные
+    одним набором запросов вместо обработки каждой строки."""
+
+    token = SUSPENDED.set(True)
+    try:
+        yield
+    finally:
+        SUSPENDED.reset(token)
+
+
+def suspendable(handler):
+    """Обработчик сигнала, не вызываемый внутри suspended_signals."""
+
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        if not SUSPENDED.get():
+            return handler(*args, **kwargs)
+    return wrapper
+
+
+@receiver(pre_save, sender=Review)
+@suspendable
+def remember_previous_score(sender, instance, raw, **kwargs):
+    """Запоминает оценку, сохранённую в БД до изменения отзыва, если
+    она учитывалась в рейтинге."""
+
+    instance._previous_score = None
+    if instance.pk and not raw:
+        instance._previous_score = (
+            Review.objects.filter(pk=instance.pk, is_hidden=False)
+            .values_list('score', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Review)
+@suspendable
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    """Учитывает новый отзыв, изменённую оценку или смену видимости
+    отзыва в рейтинге."""
+
+    if raw:
+        return
+    score = None if instance.is_hidden else int(instance.score)
+    previous_score = getattr(instance, '_previous_score', None)
+    if score == previous_score:
+        return
+    Title.objects.filter(pk=instance.title_id).shift_rating(
+        (score or 0) - (previous_score or 0),
+        (score is not None) - (previous_score is not None)
+    )
+    if previous_score is not None:
+        RatingBucket.objects.shift(instance.title_id, previous_score, -1)
+    if score is not None:
+        RatingBucket.objects.shift(instance.title_id, score, 1)
+
+
+@receiver(post_delete, sender=Review)
+@suspendable
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Исключает удалённый отзыв из рейтинга."""
+
+    if instance.is_hidden:
+        return
+    score = int(instance.score)
+    Title.objects.filter(pk=instance.title_id).shift_rating(-score, -1)
+    RatingBucket.objects.shift(instance.title_id, score, -1)
+
+
+@receiver(post_save, sender=Title)
+@suspendable
+def rebuild_leaderboard_on_title_save(sender, instance, raw, **kwargs):
+    """Обновляет категорию произведения в таблице лучших."""
+
+    if not raw:
+        LeaderboardEntry.objects.rebuild_for(
+            Title.objects.filter(pk=instance.pk)
+        )
+
+
+@receiver(post_save, sender=GenreTitle)
+@suspendable
+def rebuild_leaderboard_on_genre_save(sender, instance, raw, **kwargs):
+    """Добавляет жанр произведения в таблицу лучших."""
+
+    if not raw:
+        LeaderboardEntry.objects.rebuild_for(
+            Title.objects.filter(pk=instance.title_id)
+        )
+
+
+@receiver(post_delete, sender=GenreTitle)
+@suspendable
+def remove_leaderboard_genre_entry(sender, instance, **kwargs):
+    """Убирает жанр произведения из таблицы лучших."""
+
+    LeaderboardEntry.objects.filter(
+        title_id=instance.title_id, genre_id=instance.genre_id
+    ).delete()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+@suspendable
+def rebuild_leaderboard_on_genre_add(sender, instance, action, reverse,
+                                     pk_set, **kwargs):
+    """Учитывает жанры, добавленные через Title.genre без сигналов
+    сохранения связующей модели."""
+
+    if action != 'post_add':
+        return
+    titles = (Title.objects.filter(pk__in=pk_set) if reverse
+              else Title.objects.filter(pk=instance.pk))
+    LeaderboardEntry.objects.rebuild_for(titles)
+
+
+@receiver(post_save, sender=Title)
+@suspendable
+def index_title_on_save(sender, instance, raw, **kwargs):
+    """Переиндексирует название и описание произведения."""
+
+    if not raw:
+        index_titles([instance])
+        index_names([instance])
+
+
+@receiver(pre_delete, sender=Title)
+@suspendable
+def unindex_title_on_delete(sender, instance, **kwargs):
+    """Убирает удаляемое произведение из поисковых индексов."""
+
+    unindex_titles([instance.pk])
+    unindex_names([instance.pk])
+
+
+def touch(*querysets):
+    """Обновляет updated_at объектов, ответ API которых содержит
+    изменённые связанные строки: по этому полю строится Last-Modified."""
+
+    now = timezone.now()
+    for queryset in querysets:
+        queryset.update(updated_at=now)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+@suspendable
+def touch_titles_on_category_change(sender, instance, **kwargs):
+    """Категория входит в ответ произведения, а её удаление обнуляет
+    Title.category запросом update без изменения updated_at."""
+
+    if not kwargs.get('created') and not kwargs.get('raw'):
+        touch(Title.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Genre)
+@suspendable
+def touch_titles_on_genre_save(sender, instance, created, raw, **kwargs):
+    """Жанры входят в ответ произведения."""
+
+    if not created and not raw:
+        touch(Title.objects.filter(genre=instance))
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+@suspendable
+def touch_title_on_genre_link_change(sender, instance, **kwargs):
+    """Учитывает добавленный или удалённый жанр произведения, в том
+    числе при каскадном удалении жанра."""
+
+    if not kwargs.get('raw'):
+        touch(Title.objects.filter(pk=instance.title_id))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+@suspendable
+def touch_titles_on_genre_add(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    """Title.genre.add вставляет связи без сигналов сохранения; удаление
+    через remove и clear проходит через post_delete связующей модели."""
+
+    if action == 'post_add':
+        touch(Title.objects.filter(pk__in=pk_set) if reverse
+              else Title.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_save, sender=User)
+@suspendable
+def remember_previous_username(sender, instance, raw, **kwargs):
+    """Запоминает имя пользователя, сохранённое в БД до изменения."""
+
+    instance._previous_username = None
+    if instance.pk and not raw:
+        instance._previous_username = (
+            User.objects.filter(pk=instance.pk)
+            .values_list('username', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=User)
+@suspendable
+def touch_publications_on_rename(sender, instance, created, raw, **kwargs):
+    """Имя автора входит в ответы его отзывов и комментариев."""
+
+    previous = getattr(instance, '_previous_username', None)
+    if not created and not raw and previous not in (None,
+                                                    instance.username):
+        touch(Review.objects.filter(author=instance),
+              Comment.objects.filter(author=instance))
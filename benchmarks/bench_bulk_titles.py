@@ -0,0 +1,63 @@
+"""Создание произведений по одному и массово.
+
+Сравнивает POST /api/v1/titles/ для каждого произведения с одним
+POST /api/v1/titles/bulk/ на тот же набор.
+"""
+import argparse
+import time
+
+from utils import fill_titles, setup_django
+
+
+def make_titles(count, offset):
+    return [
+        {
+            'name': f'Новое произведение {offset + number}',
+            'year': 1950 + number % 70,
+            'genre': [f'genre-{number % 5 + 1}', f'genre-{number % 3 + 1}'],
+            'category': f'category-{number % 10 + 1}',
+            'description': f'Описание произведения номер {offset + number}',
+        }
+        for number in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=10000)
+    parser.add_argument('--rows', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    fill_titles(args.titles)
+
+    from reviews.models import Genre
+    from rest_framework.test import APIClient
+    from users.models import User
+
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(1, 6)
+    )
+    client = APIClient()
+    client.force_authenticate(
+        User.objects.create(username='admin', email='admin@example.com',
+                            role='admin')
+    )
+
+    start = time.perf_counter()
+    for item in make_titles(args.rows, 0):
+        response = client.post('/api/v1/titles/', item, format='json')
+        assert response.status_code == 201, response.content
+    single = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    response = client.post('/api/v1/titles/bulk/',
+                           make_titles(args.rows, args.rows), format='json')
+    assert response.status_code == 201, response.content
+    bulk = (time.perf_counter() - start) * 1000
+    print(f'по одному: {single:.0f} мс, массово: {bulk:.0f} мс '
+          f'на {args.rows} произведений ({single / bulk:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
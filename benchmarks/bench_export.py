@@ -0,0 +1,68 @@
+"""Выгрузка каталога в NDJSON.
+
+Сравнивает сборку всего ответа списком с потоковой выгрузкой
+/api/v1/titles/export/: время до первой строки, общее время и пик
+памяти Python (tracemalloc).
+"""
+import argparse
+import time
+import tracemalloc
+
+from utils import fill_titles, setup_django
+
+
+def measure(func):
+    """Время до первого блока, общее время (мс), пик памяти (МБ) и
+    размер ответа. Память измеряется отдельным прогоном: tracemalloc
+    замедляет выполнение."""
+
+    start = time.perf_counter()
+    first = None
+    size = 0
+    for block in func():
+        if first is None:
+            first = time.perf_counter() - start
+        size += len(block)
+    total = time.perf_counter() - start
+    tracemalloc.start()
+    for block in func():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first * 1000, total * 1000, peak / 2 ** 20, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=100000)
+    args = parser.parse_args()
+
+    setup_django()
+    fill_titles(args.titles)
+
+    from api.renderers import NDJSONRenderer
+    from api.v1.serializers import TitleReadSerializer
+    from django.test import Client
+    from reviews.models import Title
+
+    def serialized_list():
+        titles = Title.objects.select_related('category').prefetch_related(
+            'genre'
+        ).order_by('pk')
+        data = TitleReadSerializer(titles, many=True).data
+        yield NDJSONRenderer().render(list(data))
+
+    def export():
+        response = Client().get('/api/v1/titles/export/')
+        yield from response.streaming_content
+
+    # Первый запрос импортирует URL-конфигурацию и вьюсеты.
+    Client().get('/api/v1/titles/')
+    for name, func in (('поток', export), ('список', serialized_list)):
+        first, total, peak, size = measure(func)
+        print(f'{name}: первый байт {first:.0f} мс, всего {total:.0f} мс, '
+              f'пик памяти {peak:.1f} МБ, {size / 2 ** 20:.1f} МБ ответа')
+
+
+if __name__ == '__main__':
+    main()
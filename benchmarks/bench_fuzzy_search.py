@@ -0,0 +1,85 @@
+"""Нечёткий поиск по названиям на большом каталоге.
+
+Сравнивает `fuzzy_search` с триграммным индексом и полный перебор
+названий с подсчётом той же похожести, а также показывает время
+построения индекса.
+"""
+import argparse
+import random
+import time
+
+from utils import fill_titles, setup_django, timed
+
+CONSONANTS = 'бвгджзклмнпрстфхцчшщ'
+VOWELS = 'аеиоуыэюя'
+WORDS = 20000
+QUERIES = 20
+
+
+def make_word(rnd):
+    """Слово из чередующихся согласных и гласных."""
+
+    length = rnd.randint(4, 10)
+    return ''.join(
+        rnd.choice(VOWELS if i % 2 else CONSONANTS) for i in range(length)
+    )
+
+
+def make_vocabulary(rnd):
+    return [make_word(rnd) for _ in range(WORDS)]
+
+
+def misspell(rnd, name):
+    """Заменяет одну букву названия."""
+
+    position = rnd.randrange(len(name))
+    return name[:position] + rnd.choice('аеиоуя') + name[position + 1:]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=1000000)
+    args = parser.parse_args()
+
+    setup_django()
+    rnd = random.Random(1)
+    vocabulary = make_vocabulary(rnd)
+    fill_titles(args.titles, make_name=lambda rnd, pk: ' '.join(
+        rnd.choice(vocabulary) for _ in range(rnd.randint(1, 3))
+    ).capitalize())
+
+    from reviews.fuzzy import (fuzzy_search, rebuild_trigrams, similarity,
+                               trigrams)
+    from reviews.models import Title
+
+    started = time.perf_counter()
+    rebuild_trigrams()
+    print(f'построение индекса: {time.perf_counter() - started:.1f} с')
+
+    names = dict(Title.objects.filter(
+        pk__in=[rnd.randint(1, args.titles) for _ in range(QUERIES)]
+    ).values_list('pk', 'name'))
+    queries = {pk: misspell(rnd, name) for pk, name in names.items()}
+
+    def full_scan(query, threshold=0.3):
+        query_trigrams = trigrams(query)
+        scores = {}
+        for pk, name in Title.objects.values_list('pk', 'name').iterator():
+            score = similarity(query_trigrams, trigrams(name))
+            if score >= threshold:
+                scores[pk] = score
+        return sorted(scores, key=lambda pk: (-scores[pk], pk))
+
+    found = sum(pk in fuzzy_search(query) for pk, query in queries.items())
+    print(f'найдено исходных названий: {found} из {len(queries)}')
+    indexed = sum(timed(lambda: fuzzy_search(query), repeat=3)
+                  for query in queries.values()) / len(queries)
+    print(f'fuzzy_search: {indexed:.2f} мс на запрос')
+    query = next(iter(queries.values()))
+    assert full_scan(query) == fuzzy_search(query)
+    print(f'полный перебор: {timed(lambda: full_scan(query), repeat=1):.0f} '
+          f'мс на запрос')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Стоимость кодирования ответа в JSON.
+
+Сравнивает JSONRenderer из DRF, StdlibJSONRenderer и FastJSONRenderer
+(с orjson, если он установлен) на странице отзывов с длинным русским
+текстом в том виде, в каком её возвращает ValuesReader.
+"""
+import argparse
+
+from utils import setup_django, timed
+
+TEXT = ('Длинный отзыв о произведении: сюжет, персонажи, музыка и '
+        'впечатления после просмотра. ') * 8
+
+
+def make_page(rows):
+    """Страница отзывов с пагинацией по номеру страницы."""
+
+    return {
+        'count': rows * 100,
+        'next': 'http://testserver/api/v1/titles/1/reviews/?page=2',
+        'previous': None,
+        'results': [
+            {
+                'id': pk,
+                'text': TEXT,
+                'author': f'user{pk}',
+                'score': pk % 10 + 1,
+                'pub_date': '2023-01-01T00:00:00.123456Z',
+            }
+            for pk in range(1, rows + 1)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from api.renderers import (FastJSONRenderer, StdlibJSONRenderer,
+                               orjson)
+    from rest_framework.renderers import JSONRenderer
+
+    page = make_page(args.rows)
+    expected = JSONRenderer().render(page)
+    baseline = None
+    renderers = (
+        ('JSONRenderer', JSONRenderer()),
+        ('StdlibJSONRenderer', StdlibJSONRenderer()),
+        ('FastJSONRenderer' + (' (orjson)' if orjson else ''),
+         FastJSONRenderer()),
+    )
+    for name, renderer in renderers:
+        assert renderer.render(page) == expected
+        elapsed = timed(lambda: renderer.render(page))
+        baseline = baseline or elapsed
+        print(f'{name}: {elapsed:.2f} мс на страницу из {args.rows} строк '
+              f'({baseline / elapsed:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Стоимость сборки ответа списков в расчёте на строку.
+
+Сравнивает сериализаторы DRF на экземплярах моделей и ValuesReader на
+строках .values() для произведений, отзывов и комментариев. Время
+включает чтение страницы из БД.
+"""
+import argparse
+
+from utils import fill_titles, setup_django, timed
+
+TEXT = ('Длинный отзыв о произведении: сюжет, персонажи, музыка и '
+        'впечатления после просмотра. ') * 8
+
+
+def fill_related(rows):
+    """Жанры произведений, пользователи, отзывы и комментарии."""
+
+    from django.utils import timezone
+    from reviews.models import Comment, Genre, GenreTitle, Review
+    from users.models import User
+
+    Genre.objects.bulk_create(
+        Genre(pk=i, name=f'Жанр {i}', slug=f'genre-{i}') for i in range(1, 6)
+    )
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title_id=title_id, genre_id=genre_id)
+        for title_id in range(1, rows + 1)
+        for genre_id in range(1, title_id % 3 + 2)
+    )
+    User.objects.bulk_create(
+        User(pk=i, username=f'user{i}', email=f'user{i}@example.com')
+        for i in range(1, rows + 1)
+    )
+    now = timezone.now()
+    Review.objects.bulk_create(
+        Review(pk=i, title_id=1, author_id=i, text=TEXT, score=i % 10 + 1,
+               pub_date=now)
+        for i in range(1, rows + 1)
+    )
+    Comment.objects.bulk_create(
+        Comment(review_id=1, author_id=i, text=TEXT, pub_date=now)
+        for i in range(1, rows + 1)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    fill_titles(args.titles)
+    fill_related(args.rows)
+
+    from api.v1.readers import ValuesReader
+    from api.v1.serializers import (CommentSerializer, ReviewSerializer,
+                                    TitleReadSerializer)
+    from reviews.models import Comment, Review, Title
+
+    cases = (
+        ('произведения', TitleReadSerializer,
+         Title.objects.select_related('category').prefetch_related('genre')),
+        ('отзывы', ReviewSerializer,
+         Review.objects.filter(title_id=1).select_related('author')),
+        ('комментарии', CommentSerializer,
+         Comment.objects.filter(review_id=1).select_related('author')),
+    )
+    for name, serializer_class, queryset in cases:
+        queryset = queryset.order_by('pk')[:args.rows]
+        reader = ValuesReader.for_serializer(serializer_class())
+        rows = reader.prepare(queryset)
+        assert serializer_class(queryset.all(), many=True).data == (
+            reader.represent(rows.all())
+        )
+        before = timed(
+            lambda: serializer_class(queryset.all(), many=True).data
+        )
+        after = timed(lambda: reader.represent(rows.all()))
+        print(f'{name}: сериализатор {before * 1000 / args.rows:.1f} мкс, '
+              f'ValuesReader {after * 1000 / args.rows:.1f} мкс на строку '
+              f'({before / after:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Скорость команды load на сгенерированных CSV-файлах.
+
+Сравнивает загрузку отзывов прежним способом (get_object_or_404 для
+каждого внешнего ключа и objects.create для каждой строки) с командой
+load: словари id, проверка пакетами и bulk_create. Сравнивает время
+загрузки всех файлов в одном процессе и с --workers. Для потокового
+режима (--stream) выводит пиковую память Python при загрузке и время
+продолжения после прерывания, а для синхронизации (--upsert) - время
+применения изменений в 1% отзывов против полной перезагрузки.
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+
+from utils import setup_django
+
+FIELDS = {
+    'users.csv': ('id', 'username', 'email', 'role', 'bio', 'first_name',
+                  'last_name'),
+    'category.csv': ('id', 'name', 'slug'),
+    'genre.csv': ('id', 'name', 'slug'),
+    'titles.csv': ('id', 'name', 'year', 'category'),
+    'genre_title.csv': ('id', 'title_id', 'genre_id'),
+    'review.csv': ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    'comments.csv': ('id', 'review_id', 'text', 'author', 'pub_date'),
+}
+PUB_DATE = '2020-01-13T23:20:02.422Z'
+
+
+def generate(data_dir, rows, seed=0):
+    """CSV-файлы: rows произведений, отзывов и комментариев."""
+
+    rnd = random.Random(seed)
+    users = max(rows // 10, 1)
+    data = {
+        'users.csv': [(i, f'user{i}', f'user{i}@example.com', 'user', '', '',
+                       '') for i in range(1, users + 1)],
+        'category.csv': [(i, f'Категория {i}', f'category-{i}')
+                         for i in range(1, 11)],
+        'genre.csv': [(i, f'Жанр {i}', f'genre-{i}') for i in range(1, 21)],
+        'titles.csv': [(i, f'Произведение {i}', rnd.randint(1900, 2020),
+                        rnd.randint(1, 10)) for i in range(1, rows + 1)],
+        'genre_title.csv': [(i, i, rnd.randint(1, 20))
+                            for i in range(1, rows + 1)],
+        'review.csv': [(i, i, f'Отзыв номер {i}', i % users + 1,
+                        rnd.randint(1, 10), PUB_DATE)
+                       for i in range(1, rows + 1)],
+        'comments.csv': [(i, i, f'Комментарий номер {i}', i % users + 1,
+                          PUB_DATE) for i in range(1, rows + 1)],
+    }
+    for name, lines in data.items():
+        with open(os.path.join(data_dir, name), 'w', encoding='utf-8',
+                  newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(FIELDS[name])
+            writer.writerows(lines)
+
+
+def legacy_reviews(path, limit):
+    """Время прежней построчной загрузки первых limit отзывов."""
+
+    from django.shortcuts import get_object_or_404
+    from reviews.models import Review, Title
+    from reviews.signals import suspended_signals
+    from users.models import User
+
+    # Очистка таблицы не входит в измерение.
+    with suspended_signals():
+        Review.objects.all().delete()
+    started = time.perf_counter()
+    with open(path, encoding='utf-8') as file:
+        for number, row in enumerate(csv.DictReader(file)):
+            if number == limit:
+                break
+            row['title'] = get_object_or_404(Title, id=row.pop('title_id'))
+            row['author'] = get_object_or_404(User, id=row.pop('author'))
+            Review.objects.create(**row)
+    return time.perf_counter() - started
+
+
+def clear():
+    """Очищает загружаемые таблицы вне измерений."""
+
+    from api.management.commands.load import FILES, wipe_tables
+
+    wipe_tables([model for model, _ in FILES])
+
+
+def load(data_dir, **options):
+    from django.core.management import call_command
+
+    out = StringIO()
+    call_command('load', data_dir=data_dir, stdout=out, **options)
+    return out.getvalue()
+
+
+def stream(data_dir, batch_size):
+    """Потоковая загрузка отзывов, прерванная на середине файла, и её
+    продолжение. Возвращает пиковую память и время продолжения."""
+
+    from api.management.commands.load import StreamingLoader
+    from reviews.models import LoadCheckpoint, Review
+    from reviews.signals import suspended_signals
+
+    with suspended_signals():
+        Review.objects.all().delete()
+    LoadCheckpoint.objects.all().delete()
+    path = os.path.join(data_dir, 'review.csv')
+    insert = StreamingLoader.insert
+    half = os.path.getsize(path) // 2
+
+    def interrupted_insert(loader, batch):
+        if loader.offset > half:
+            raise KeyboardInterrupt
+        insert(loader, batch)
+
+    tracemalloc.start()
+    StreamingLoader.insert = interrupted_insert
+    try:
+        with suspended_signals():
+            StreamingLoader(Review, path, batch_size).load()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        StreamingLoader.insert = insert
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    started = time.perf_counter()
+    with suspended_signals():
+        loader = StreamingLoader(Review, path, batch_size)
+        loader.load()
+    elapsed = time.perf_counter() - started
+    return peak, elapsed, loader, Review.objects.count()
+
+
+def change_reviews(data_dir, share, seed=1):
+    """Меняет оценку в доле share отзывов файла."""
+
+    rnd = random.Random(seed)
+    path = os.path.join(data_dir, 'review.csv')
+    with open(path, encoding='utf-8', newline='') as file:
+        rows = list(csv.reader(file))
+    for row in rnd.sample(rows[1:], int((len(rows) - 1) * share)):
+        row[4] = str(int(row[4]) % 10 + 1)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        csv.writer(file).writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--legacy-rows', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    setup_django()
+    data_dir = tempfile.mkdtemp()
+    generate(data_dir, args.rows)
+
+    wall = {}
+    for workers in (1, args.workers):
+        clear()
+        started = time.perf_counter()
+        output = load(data_dir, batch_size=args.batch_size, workers=workers)
+        wall[workers] = time.perf_counter() - started
+        print(f'--workers {workers}', output, sep='\n', end='')
+    print(f'Ускорение с {args.workers} процессами на {os.cpu_count()} '
+          f'ядрах: {wall[1] / wall[args.workers]:.2f}x')
+
+    peak, elapsed, loader, count = stream(data_dir, args.batch_size)
+    print(f'Review потоково: пик памяти {peak / 2 ** 20:.1f} МБ, '
+          f'продолжено после строки {loader.resumed_from}, '
+          f'загружено ещё {loader.loaded} за {elapsed:.2f} с, '
+          f'всего {count}')
+
+    load(data_dir)
+    change_reviews(data_dir, 0.01)
+    for title, options in (('--upsert', {'upsert': True}),
+                           ('полная перезагрузка', {})):
+        started = time.perf_counter()
+        output = load(data_dir, batch_size=args.batch_size, **options)
+        print(f'Изменения в 1% отзывов, {title}: '
+              f'{time.perf_counter() - started:.2f} с')
+        if options:
+            print(output, end='')
+
+    elapsed = legacy_reviews(os.path.join(data_dir, 'review.csv'),
+                             args.legacy_rows)
+    print(f'Review построчно: {args.legacy_rows / elapsed:.0f} строк/с')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Удаление отзывов по одному и массовой модерацией.
+
+Сравнивает DELETE /api/v1/titles/{id}/reviews/{id}/ для каждого отзыва
+с одним POST /api/v1/moderation/ на такой же набор отзывов. У каждого
+отзыва есть комментарии, а отзывы распределены по нескольким
+произведениям.
+"""
+import argparse
+import time
+
+from utils import fill_titles, setup_django
+
+
+def fill_reviews(rows, titles, comments):
+    """Пользователи, отзывы на titles произведений и комментарии."""
+
+    from django.utils import timezone
+    from reviews.models import Comment, Review, Title
+    from users.models import User
+
+    User.objects.bulk_create(
+        User(pk=i, username=f'user{i}', email=f'user{i}@example.com')
+        for i in range(1, rows + 1)
+    )
+    now = timezone.now()
+    Review.objects.bulk_create(
+        Review(pk=i, title_id=i % titles + 1, author_id=i, text='Спам',
+               score=i % 10 + 1, pub_date=now)
+        for i in range(1, rows + 1)
+    )
+    Comment.objects.bulk_create(
+        Comment(review_id=review_id, author_id=review_id, text='Спам',
+                pub_date=now)
+        for review_id in range(1, rows + 1)
+        for _ in range(comments)
+    )
+    Title.objects.filter(pk__lte=titles).refresh_ratings()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=10000)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--comments', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    fill_titles(args.titles)
+    fill_reviews(args.rows * 2, 20, args.comments)
+
+    from rest_framework.test import APIClient
+    from reviews.models import Review
+    from users.models import User
+
+    client = APIClient()
+    client.force_authenticate(
+        User.objects.create(username='moderator',
+                            email='moderator@example.com',
+                            role='moderator')
+    )
+    reviews = list(Review.objects.order_by('pk')
+                   .values_list('pk', 'title_id'))
+    single, bulk = reviews[:args.rows], reviews[args.rows:]
+
+    start = time.perf_counter()
+    for review_id, title_id in single:
+        response = client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/'
+        )
+        assert response.status_code == 204, response.content
+    single_time = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    response = client.post('/api/v1/moderation/', {
+        'action': 'delete', 'reviews': [pk for pk, _ in bulk]
+    }, format='json')
+    assert response.status_code == 200, response.content
+    bulk_time = (time.perf_counter() - start) * 1000
+    print(f'по одному: {single_time:.0f} мс, массово: {bulk_time:.0f} мс '
+          f'на {args.rows} отзывов ({single_time / bulk_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Полнотекстовый поиск по большому каталогу.
+
+Сравнивает `search_titles` по инвертированному индексу с поиском
+подстроки в названиях через LIKE, который читает всю таблицу, и
+показывает время построения индекса. Выдача LIKE не совпадает с поиском
+по основам слов и приведена только для сравнения времени. Запросы из
+одного и двух слов берутся из названий случайных произведений.
+"""
+import argparse
+import random
+import time
+
+from bench_fuzzy_search import make_vocabulary
+from utils import fill_titles, setup_django, timed
+
+QUERIES = 20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=1000000)
+    args = parser.parse_args()
+
+    setup_django()
+    rnd = random.Random(1)
+    vocabulary = make_vocabulary(rnd)
+    fill_titles(args.titles, make_name=lambda rnd, pk: ' '.join(
+        rnd.choice(vocabulary) for _ in range(rnd.randint(1, 3))
+    ).capitalize())
+
+    from reviews.models import Title
+    from reviews.search import rebuild_index, search_titles
+
+    started = time.perf_counter()
+    rebuild_index()
+    print(f'построение индекса: {time.perf_counter() - started:.1f} с')
+
+    names = Title.objects.filter(
+        pk__in=[rnd.randint(1, args.titles) for _ in range(QUERIES * 3)]
+    ).values_list('name', flat=True)
+    words = [name.split() for name in names]
+    queries = {
+        'одно слово': [name[0] for name in words][:QUERIES],
+        'два слова': [' '.join(name[:2]) for name in words
+                      if len(name) > 1][:QUERIES],
+    }
+    for label, texts in queries.items():
+        found = sum(len(search_titles(text)) for text in texts) / len(texts)
+        indexed = sum(timed(lambda: search_titles(text), repeat=3)
+                      for text in texts) / len(texts)
+        print(f'search_titles, {label}: {indexed:.2f} мс на запрос, '
+              f'в среднем {found:.0f} результатов')
+
+    text = queries['одно слово'][0]
+    like = timed(lambda: list(
+        Title.objects.filter(name__icontains=text).values_list('pk',
+                                                               flat=True)
+    ), repeat=1)
+    print(f'LIKE по названиям: {like:.0f} мс на запрос')
+
+
+if __name__ == '__main__':
+    main()
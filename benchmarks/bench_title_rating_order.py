@@ -0,0 +1,41 @@
+"""Сортировка и фильтрация произведений по рейтингу на большом каталоге.
+
+Показывает план запроса эндпоинта `/api/v1/titles/` и время выдачи
+первой страницы для `?ordering=-rating` и `?rating_min=&rating_max=`.
+"""
+import argparse
+
+from utils import fill_titles, setup_django, timed
+
+QUERIES = (
+    'ordering=-rating',
+    'ordering=-rating,year,name',
+    'rating_min=8&rating_max=9&ordering=-rating',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=1000000)
+    args = parser.parse_args()
+
+    setup_django()
+    fill_titles(args.titles)
+
+    from api.v1.views import TitleViewSet
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    factory = APIRequestFactory()
+    for query in QUERIES:
+        view = TitleViewSet(action='list', format_kwarg=None, kwargs={})
+        view.request = Request(factory.get(f'/api/v1/titles/?{query}'))
+        queryset = view.filter_queryset(view.get_queryset())[:10]
+        print(f'?{query}')
+        print(queryset.explain())
+        print(f'  первая страница: '
+              f'{timed(lambda: list(queryset.all())):.2f} мс\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""Пересчёт взвешенного рейтинга командой weighted_rating.
+
+Первый запуск записывает значения для всех оценённых произведений,
+повторный - только проверяет, что ничего не изменилось.
+"""
+import argparse
+import time
+
+from utils import fill_titles, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=1000000)
+    args = parser.parse_args()
+
+    setup_django()
+    fill_titles(args.titles)
+
+    from django.core.management import call_command
+
+    for run in ('первый запуск', 'повторный запуск'):
+        start = time.perf_counter()
+        call_command('weighted_rating')
+        print(f'{run}: {time.perf_counter() - start:.2f} с')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Общие функции для бенчмарков на отдельной базе SQLite.
+
+Бенчмарки запускаются из корня репозитория:
+
+    python benchmarks/<имя_скрипта>.py --titles 1000000
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent / 'api_yamdb'
+UPDATED_AT = '2023-01-01 00:00:00'
+
+
+def setup_django(db_path=None):
+    """Настраивает Django на временную БД и применяет миграции."""
+
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+    import django
+    from django.conf import settings
+
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    settings.DATABASES['default']['NAME'] = db_path
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+def fill_titles(count, batch_size=50000, seed=0, make_name=None):
+    """Быстро заполняет таблицы категорий и произведений.
+
+    make_name(rnd, pk) возвращает название произведения; по умолчанию
+    названия отличаются только номером.
+    """
+
+    from django.db import connection, transaction
+
+    rnd = random.Random(seed)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO reviews_category (id, name, slug) '
+            'VALUES (%s, %s, %s)',
+            [(i, f'Категория {i}', f'category-{i}') for i in range(1, 11)]
+        )
+        for start in range(0, count, batch_size):
+            rows = []
+            for pk in range(start + 1, min(start + batch_size, count) + 1):
+                reviews = rnd.randint(0, 50)
+                score_sum = sum(rnd.randint(1, 10) for _ in range(reviews))
+                name = (make_name(rnd, pk) if make_name
+                        else f'Произведение {pk}')
+                rows.append((
+                    pk, name, '', rnd.randint(1900, 2023),
+                    rnd.randint(1, 10), score_sum, reviews,
+                    score_sum / reviews if reviews else None, UPDATED_AT
+                ))
+            cursor.executemany(
+                'INSERT INTO reviews_title (id, name, description, year, '
+                'category_id, score_sum, review_count, rating, updated_at) '
+                'VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)',
+                rows
+            )
+        cursor.execute('ANALYZE')
+
+
+def timed(func, repeat=5):
+    """Возвращает лучшее время выполнения функции в миллисекундах."""
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
@@ -3,8 +3,8 @@ from http import HTTPStatus
 import pytest
 from django.db.utils import IntegrityError
 
-from tests.utils import (check_fields, check_pagination, create_reviews,
-                         create_single_review, create_titles)
+from tests.utils import (check_cursor_pagination, check_fields,
+                         create_reviews, create_single_review, create_titles)
 
 
 @pytest.mark.django_db(transaction=True)
@@ -186,7 +186,7 @@ class Test05ReviewAPI:
             'статусом 200.'
         )
         data = response.json()
-        check_pagination(url, data, title_0_reviews_count)
+        check_cursor_pagination(url, data, title_0_reviews_count)
 
         expected_data = {
             'text': post_data['text'],
@@ -2,8 +2,9 @@ from http import HTTPStatus
 
 import pytest
 
-from tests.utils import (check_fields, check_pagination, create_comments,
-                         create_reviews, create_single_comment)
+from tests.utils import (check_cursor_pagination, check_fields,
+                         create_comments, create_reviews,
+                         create_single_comment)
 
 
 @pytest.mark.django_db(transaction=True)
@@ -90,7 +91,7 @@ class Test06CommentAPI:
             f'`{url}` возвращает ответ со статусом 200.'
         )
         data = response.json()
-        check_pagination(url, data, first_review_comment_cnt)
+        check_cursor_pagination(url, data, first_review_comment_cnt)
 
         expected_data = {
             'text': post_data['text'],
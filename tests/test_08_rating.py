@@ -0,0 +1,228 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from tests.utils import create_reviews, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08RatingAPI:
+
+    def test_01_rating_follows_review_changes(self, admin_client, admin,
+                                              user_client, user,
+                                              moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{{review_id}}/'
+
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 5, (
+            'Проверьте, что рейтинг произведения равен средней оценке '
+            'созданных отзывов.'
+        )
+
+        response = user_client.patch(
+            review_url.format(review_id=reviews[1]['id']),
+            data={'score': 8}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 6, (
+            'Проверьте, что изменение оценки в отзыве пересчитывает '
+            'рейтинг произведения.'
+        )
+
+        response = moderator_client.delete(
+            review_url.format(review_id=reviews[2]['id'])
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') == 6.5, (
+            'Проверьте, что удаление отзыва пересчитывает рейтинг '
+            'произведения.'
+        )
+
+        for review in reviews[:2]:
+            admin_client.delete(review_url.format(review_id=review['id']))
+        response = admin_client.get(title_url)
+        assert response.json().get('rating') is None, (
+            'Проверьте, что у произведения без отзывов рейтинг равен `None`.'
+        )
+
+    def test_02_rating_list_query_count(self, admin_client, user_client,
+                                        django_assert_max_num_queries):
+        reviews, titles = create_reviews(admin_client, {})
+        for title in titles:
+            create_single_review(user_client, title['id'], 'text', 7)
+
+        with django_assert_max_num_queries(4):
+            response = admin_client.get('/api/v1/titles/')
+        for title in response.json()['results']:
+            assert title.get('rating') == 7, (
+                'Проверьте, что рейтинг в списке произведений берётся из '
+                'сохранённого значения.'
+            )
+
+    def test_03_titles_ordering_and_rating_range(self, admin_client,
+                                                 user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'text', 3)
+        create_single_review(user_client, titles[1]['id'], 'text', 9)
+        url = '/api/v1/titles/'
+
+        response = admin_client.get(f'{url}?ordering=-rating')
+        assert response.status_code == HTTPStatus.OK
+        names = [title['name'] for title in response.json()['results']]
+        assert names == [titles[1]['name'], titles[0]['name']], (
+            f'Проверьте, что `{url}?ordering=-rating` сортирует '
+            'произведения по убыванию рейтинга.'
+        )
+
+        response = admin_client.get(f'{url}?ordering=year')
+        names = [title['name'] for title in response.json()['results']]
+        assert names == [titles[0]['name'], titles[1]['name']], (
+            f'Проверьте, что `{url}?ordering=year` сортирует '
+            'произведения по году.'
+        )
+
+        response = admin_client.get(f'{url}?rating_min=5&rating_max=10')
+        data = response.json()['results']
+        assert [title['id'] for title in data] == [titles[1]['id']], (
+            f'Проверьте, что `{url}?rating_min=&rating_max=` фильтрует '
+            'произведения по диапазону рейтинга.'
+        )
+
+    def test_04_rating_distribution(self, client, admin_client, admin,
+                                    user_client, user, moderator_client,
+                                    moderator):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/rating-distribution/'
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        data = response.json()
+        assert data['count'] == 0 and data['median'] is None
+        assert data['distribution'] == {str(i): 0 for i in range(1, 11)}
+
+        for author_client, score in ((admin_client, 2), (user_client, 8),
+                                     (moderator_client, 8)):
+            create_single_review(author_client, titles[0]['id'], 'text', score)
+        review_id = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        ).json()['results'][0]['id']
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{review_id}/',
+            data={'score': 5}
+        )
+
+        data = client.get(url).json()
+        expected = {str(i): 0 for i in range(1, 11)}
+        expected.update({'2': 1, '5': 1, '8': 1})
+        assert data['distribution'] == expected, (
+            f'Проверьте, что `{url}` возвращает число отзывов для каждой '
+            'оценки с учётом изменений отзывов.'
+        )
+        assert data['count'] == 3
+        assert data['mean'] == 5
+        assert data['median'] == 5
+
+    def test_05_top_titles(self, client, admin_client, user_client,
+                           moderator_client):
+        titles, categories, genres = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'text', 6)
+        create_single_review(user_client, titles[1]['id'], 'text', 9)
+        create_single_review(moderator_client, titles[1]['id'], 'text', 7)
+        url = '/api/v1/titles/top/'
+
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        assert [title['id'] for title in response.json()] == [
+            titles[1]['id'], titles[0]['id']
+        ], f'Проверьте, что `{url}` сортирует произведения по рейтингу.'
+
+        response = client.get(f'{url}?limit=1')
+        assert [title['id'] for title in response.json()] == [
+            titles[1]['id']
+        ], f'Проверьте, что `{url}?limit=` ограничивает размер выдачи.'
+
+        response = client.get(f'{url}?genre={genres[0]["slug"]}')
+        assert [title['id'] for title in response.json()] == [
+            titles[0]['id']
+        ], f'Проверьте, что `{url}?genre=` фильтрует по жанру.'
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            data={'category': categories[1]['slug'],
+                  'genre': [genres[2]['slug']]}
+        )
+        response = client.get(
+            f'{url}?category={categories[1]["slug"]}'
+            f'&genre={genres[2]["slug"]}'
+        )
+        assert [title['id'] for title in response.json()] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            f'Проверьте, что `{url}` учитывает изменение категории и '
+            'жанров произведения.'
+        )
+        response = client.get(f'{url}?genre={genres[0]["slug"]}')
+        assert response.json() == []
+
+        response = client.get(f'{url}?limit=1000')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_06_weighted_rating_command(self, admin_client, user_client,
+                                        moderator_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Плохой фильм',
+            'year': 2000,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug']
+        })
+        titles.append(response.json())
+        create_single_review(user_client, titles[0]['id'], 'text', 10)
+        for author_client in (admin_client, user_client, moderator_client):
+            create_single_review(author_client, titles[1]['id'], 'text', 9)
+        create_single_review(user_client, titles[2]['id'], 'text', 1)
+
+        call_command('weighted_rating', min_votes=3, stdout=StringIO())
+
+        url = '/api/v1/titles/'
+        response = admin_client.get(f'{url}?ordering=-weighted_rating')
+        data = response.json()['results']
+        assert [title['id'] for title in data] == [
+            titles[1]['id'], titles[0]['id'], titles[2]['id']
+        ], (
+            'Проверьте, что взвешенный рейтинг ставит произведение с '
+            'большим числом отзывов выше произведения с единственной '
+            'высокой оценкой.'
+        )
+        mean = 38 / 5
+        assert data[0]['weighted_rating'] == pytest.approx(
+            (27 + 3 * mean) / 6
+        )
+        assert data[1]['weighted_rating'] == pytest.approx(
+            (10 + 3 * mean) / 4
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT updated_at FROM reviews_title')
+            stored = [row[0] for row in cursor.fetchall()]
+        assert all(str(value).count('+') == 0 for value in stored), (
+            'Проверьте, что команда `weighted_rating` сохраняет дату '
+            'изменения в том же формате, что и ORM.'
+        )
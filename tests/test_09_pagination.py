@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+import pytest
+from api.v1.pagination import CountlessPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from reviews.models import Title
+
+from tests.utils import create_reviews, create_single_comment, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09PaginationAPI:
+
+    def test_01_comments_cursor_pagination(self, admin_client, admin,
+                                           user_client):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        created = [
+            create_single_comment(
+                user_client, titles[0]['id'], reviews[0]['id'], f'text {idx}'
+            ).json()['id']
+            for idx in range(15)
+        ]
+
+        received = []
+        next_url = url
+        while next_url:
+            response = user_client.get(next_url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert len(data['results']) <= 10
+            received.extend(comment['id'] for comment in data['results'])
+            next_url = data['next']
+        assert received == created[::-1], (
+            f'Проверьте, что курсорная пагинация `{url}` выдаёт все '
+            'комментарии от новых к старым без пропусков и повторов.'
+        )
+
+    def test_02_cached_count_invalidated_on_write(self, admin_client,
+                                                  django_assert_num_queries):
+        titles, _, genres = create_titles(admin_client)
+        url = f'/api/v1/titles/?genre={genres[0]["slug"]}'
+
+        response = admin_client.get(url)
+        assert response.json()['count'] == 1
+        with django_assert_num_queries(3):
+            response = admin_client.get(url)
+        assert response.json()['count'] == 1, (
+            'Проверьте, что повторный запрос списка произведений берёт '
+            'значение `count` из кэша.'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/',
+            data={'genre': [genres[0]['slug']]}
+        )
+        response = admin_client.get(url)
+        assert response.json()['count'] == 2, (
+            'Проверьте, что кэш значения `count` сбрасывается при '
+            'изменении произведений.'
+        )
+
+    def test_03_countless_pagination(self, admin_client):
+        create_titles(admin_client)
+        factory = APIRequestFactory()
+        paginator = CountlessPagination()
+        paginator.page_size = 1
+
+        request = Request(factory.get('/api/v1/titles/'))
+        page = paginator.paginate_queryset(
+            Title.objects.order_by('id'), request
+        )
+        data = paginator.get_paginated_response([]).data
+        assert len(page) == 1
+        assert 'count' not in data
+        assert data['previous'] is None
+        assert data['next'].endswith('?page=2')
+
+        request = Request(factory.get('/api/v1/titles/?page=2'))
+        page = paginator.paginate_queryset(
+            Title.objects.order_by('id'), request
+        )
+        data = paginator.get_paginated_response([]).data
+        assert len(page) == 1
+        assert data['next'] is None
+        assert data['previous'] == 'http://testserver/api/v1/titles/'
+
+        request = Request(factory.get('/api/v1/titles/?page=3'))
+        with pytest.raises(NotFound):
+            paginator.paginate_queryset(Title.objects.order_by('id'), request)
@@ -0,0 +1,211 @@
+from datetime import timedelta
+from http import HTTPStatus
+from itertools import count
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+from reviews.models import Genre, Title
+
+from tests.utils import (create_categories, create_genre, create_reviews,
+                         create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CacheAPI:
+
+    @pytest.mark.parametrize('url, create', (
+        ('/api/v1/categories/', create_categories),
+        ('/api/v1/genres/', create_genre),
+    ))
+    def test_01_cached_lists(self, client, admin_client, url, create,
+                             django_assert_num_queries):
+        objects = create(admin_client)
+        search_url = f'{url}?search={objects[0]["name"]}'
+
+        first = client.get(url).json()
+        first_search = client.get(search_url).json()
+        with django_assert_num_queries(0):
+            assert client.get(url).json() == first
+            assert client.get(search_url).json() == first_search, (
+                f'Проверьте, что повторный GET-запрос к `{url}` и его '
+                'вариантам с `?search=` обслуживается из кэша без запросов '
+                'к базе данных.'
+            )
+
+        admin_client.delete(f'{url}{objects[0]["slug"]}/')
+        assert client.get(url).json()['count'] == first['count'] - 1, (
+            f'Проверьте, что удаление объекта сбрасывает кэш `{url}`.'
+        )
+        assert client.get(search_url).json()['count'] == 0
+
+        admin_client.post(url, data=objects[0])
+        assert client.get(search_url).json() == first_search, (
+            f'Проверьте, что создание объекта сбрасывает кэш `{url}`.'
+        )
+
+    def test_02_title_conditional_get(self, client, admin_client, user_client,
+                                      django_assert_max_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+
+        response = client.get(url)
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+        assert etag and last_modified, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки `ETag` и `Last-Modified`.'
+        )
+        with django_assert_max_num_queries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        create_single_review(user_client, titles[0]['id'], 'text', 7)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что новый отзыв меняет `ETag` произведения `{url}`.'
+        )
+        assert response.json()['rating'] == 7
+
+    def test_03_collections_conditional_get(self, client, admin_client,
+                                            admin, user_client):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        other_reviews_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+
+        etags = {
+            url: client.get(url)['ETag']
+            for url in ('/api/v1/titles/', reviews_url, other_reviews_url,
+                        comments_url)
+        }
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным '
+                '`If-None-Match` возвращает ответ со статусом 304.'
+            )
+
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[0]['id'], 'text'
+        )
+        response = client.get(comments_url,
+                              HTTP_IF_NONE_MATCH=etags[comments_url])
+        assert response.status_code == HTTPStatus.OK
+
+        create_single_review(user_client, titles[0]['id'], 'text', 3)
+        for url, status in (('/api/v1/titles/', HTTPStatus.OK),
+                            (reviews_url, HTTPStatus.OK),
+                            (other_reviews_url, HTTPStatus.NOT_MODIFIED)):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == status, (
+                f'Проверьте, что версия коллекции `{url}` меняется только '
+                'при изменении её объектов.'
+            )
+
+    def test_04_genre_changes_reset_title_cache(self, client, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        url = f'/api/v1/titles/?genre={genres[2]["slug"]}'
+        first = client.get(url)
+        title = Title.objects.get(pk=titles[0]['id'])
+        title.genre.add(Genre.objects.get(slug=genres[2]['slug']))
+        response = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что жанры, добавленные через `Title.genre`, '
+            'сбрасывают кэш списка произведений.'
+        )
+        assert response.json()['count'] == first.json()['count'] + 1
+        title.genre.clear()
+        assert client.get(url).json()['count'] == first.json()['count']
+
+    def test_05_title_etag_within_one_second(self, client, admin_client,
+                                             user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        second = (timezone.now().replace(microsecond=0)
+                  + timedelta(seconds=1))
+        ticks = count(1)
+
+        def now():
+            return second + timedelta(microseconds=next(ticks))
+
+        with mock.patch('django.utils.timezone.now', now):
+            create_single_review(user_client, titles[0]['id'], 'text', 2)
+            response = client.get(url)
+            create_single_review(moderator_client, titles[0]['id'],
+                                 'text', 10)
+        assert response.json()['rating'] == 2
+        updated = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert updated.status_code == HTTPStatus.OK, (
+            'Проверьте, что отзывы, добавленные в течение одной секунды, '
+            'меняют `ETag` произведения.'
+        )
+        assert updated.json()['rating'] == 6
+        updated_at = Title.objects.get(pk=titles[0]['id']).updated_at
+        assert second < updated_at < second + timedelta(seconds=1), (
+            'Проверьте, что пересчёт рейтинга записывает время изменения '
+            'с точностью до микросекунд.'
+        )
+
+    def test_06_deleted_parent_collections(self, client, admin_client,
+                                           user_client):
+        titles, _, _ = create_titles(admin_client)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        reviews_etag = client.get(reviews_url)['ETag']
+        review = create_single_review(
+            user_client, titles[1]['id'], 'text', 5
+        ).json()
+        comments_url = (f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+                        f'{review["id"]}/comments/')
+        comments_etag = client.get(comments_url)['ETag']
+
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        user_client.delete(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{review["id"]}/'
+        )
+        for url, etag in ((reviews_url, reviews_etag),
+                          (comments_url, comments_etag)):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что GET-запрос к `{url}` после удаления '
+                'родительского объекта возвращает 404, а не 304.'
+            )
+
+    def test_07_related_changes_update_last_modified(self, client,
+                                                     admin_client,
+                                                     user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review = create_single_review(
+            user_client, titles[0]['id'], 'text', 5
+        ).json()
+        review_url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+                      f'{review["id"]}/')
+        last_modified = {
+            url: client.get(url)['Last-Modified']
+            for url in (title_url, review_url)
+        }
+        later = timezone.now() + timedelta(seconds=2)
+
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            admin_client.delete(
+                f'/api/v1/categories/{titles[0]["category"]}/'
+            )
+            user.username = 'renamed'
+            user.save()
+        for url, field, value in ((title_url, 'category', None),
+                                  (review_url, 'author', 'renamed')):
+            response = client.get(
+                url, HTTP_IF_MODIFIED_SINCE=last_modified[url]
+            )
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что изменение связанных объектов меняет '
+                f'`Last-Modified` ответа `{url}`.'
+            )
+            assert response.json()[field] == value
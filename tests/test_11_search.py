@@ -0,0 +1,137 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Title
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11SearchAPI:
+
+    def search(self, client, query):
+        response = client.get('/api/v1/titles/', {'q': query})
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запрос к `/api/v1/titles/?q=` возвращает '
+            'ответ со статусом 200.'
+        )
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_search_titles(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Ёжик в тумане',
+            'year': 1975,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+            'description': 'Мультфильм про ёжика и медвежонка'
+        })
+        hedgehog = response.json()['id']
+
+        assert self.search(client, 'терминатор') == [titles[0]['id']], (
+            'Проверьте, что поиск по `q` находит произведение по названию '
+            'без учёта регистра.'
+        )
+        assert self.search(client, 'ежик') == [hedgehog], (
+            'Проверьте, что при поиске буква `ё` не отличается от `е`.'
+        )
+        assert self.search(client, 'ежика') == [hedgehog], (
+            'Проверьте, что поиск учитывает окончания русских слов.'
+        )
+        assert self.search(client, 'медвеж') == [hedgehog], (
+            'Проверьте, что поиск находит произведения по началу слова.'
+        )
+        assert self.search(client, 'орешек yippie') == [titles[1]['id']], (
+            'Проверьте, что поиск ищет по названию и описанию.'
+        )
+        assert self.search(client, 'орешек терминатор') == []
+
+    def test_02_search_follows_title_changes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+
+        admin_client.patch(url, data={'name': 'Хищник',
+                                      'description': 'Охотник в джунглях'})
+        assert self.search(client, 'терминатор') == []
+        assert self.search(client, 'хищник') == [titles[0]['id']], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+
+        admin_client.delete(url)
+        assert self.search(client, 'хищник') == [], (
+            'Проверьте, что удалённое произведение исчезает из поиска.'
+        )
+
+    def test_03_search_ranking(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Орешек',
+            'year': 2000,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+            'description': 'Орешек знаний твёрд'
+        })
+        assert self.search(client, 'орешек') == [
+            response.json()['id'], titles[1]['id']
+        ], (
+            'Проверьте, что результаты поиска отсортированы по '
+            'релевантности.'
+        )
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        assert self.search(client, 'орешек') == [
+            response.json()['id'], titles[1]['id']
+        ], 'Проверьте, что перестроение индекса не меняет выдачу поиска.'
+
+    def test_04_fuzzy_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        response = client.get(url, {'fuzzy': 'Терминатр'})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}?fuzzy=` возвращает ответ '
+            'со статусом 200.'
+        )
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id']
+        ], (
+            f'Проверьте, что `{url}?fuzzy=` находит произведение по '
+            'названию с опечаткой.'
+        )
+        response = client.get(url, {'fuzzy': 'крепкий арешек'})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id']
+        ]
+        response = client.get(url, {'fuzzy': 'зыхщ'})
+        assert response.json()['results'] == []
+
+        admin_client.patch(f'{url}{titles[1]["id"]}/',
+                           data={'name': 'Терминатор 2'})
+        response = client.get(url, {'fuzzy': 'Терминатр'})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id'], titles[1]['id']
+        ], (
+            f'Проверьте, что `{url}?fuzzy=` учитывает изменение названий '
+            'и сортирует результаты по похожести.'
+        )
+
+    @pytest.mark.parametrize('param', ('q', 'fuzzy'))
+    def test_05_search_pagination(self, client, param):
+        for number in range(12):
+            Title.objects.create(name=f'Фильм {number}', year=2000)
+        url = '/api/v1/titles/'
+
+        first = client.get(url, {param: 'фильм'}).json()
+        assert 'count' not in first, (
+            f'Проверьте, что `{url}?{param}=` не возвращает `count`: поиск '
+            'ограничен числом лучших совпадений.'
+        )
+        assert len(first['results']) == 10 and first['next']
+        second = client.get(first['next']).json()
+        assert len(second['results']) == 2 and second['next'] is None
+        assert not ({title['id'] for title in first['results']}
+                    & {title['id'] for title in second['results']})
+        assert 'count' in client.get(url).json()
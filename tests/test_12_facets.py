@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12FacetsAPI:
+
+    def test_01_title_facets(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Кин-дза-дза!',
+            'year': 1986,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug']
+        })
+        url = '/api/v1/titles/'
+
+        response = client.get(url)
+        assert 'facets' not in response.json(), (
+            f'Проверьте, что `{url}` без параметра `facets` не возвращает '
+            'фасеты.'
+        )
+
+        response = client.get(url, {'facets': 'true'})
+        assert response.status_code == HTTPStatus.OK
+        facets = response.json().get('facets')
+        assert facets == {
+            'genre': [
+                {'slug': genres[0]['slug'], 'name': genres[0]['name'],
+                 'count': 2},
+                {'slug': genres[1]['slug'], 'name': genres[1]['name'],
+                 'count': 1},
+                {'slug': genres[2]['slug'], 'name': genres[2]['name'],
+                 'count': 1},
+            ],
+            'category': [
+                {'slug': categories[0]['slug'],
+                 'name': categories[0]['name'], 'count': 2},
+                {'slug': categories[1]['slug'],
+                 'name': categories[1]['name'], 'count': 1},
+            ],
+            'decade': [{'decade': 1980, 'count': 3}],
+        }, (
+            f'Проверьте, что `{url}?facets=true` возвращает число '
+            'произведений по жанрам, категориям и десятилетиям.'
+        )
+
+        response = client.get(url, {'facets': 'true',
+                                    'category': categories[1]['slug']})
+        facets = response.json()['facets']
+        assert facets['genre'] == [
+            {'slug': genres[2]['slug'], 'name': genres[2]['name'],
+             'count': 1}
+        ], (
+            f'Проверьте, что `{url}?facets=true` считает фасеты по '
+            'отфильтрованной выборке.'
+        )
+        assert facets['category'][0]['count'] == 1
+        assert response.json()['results'][0]['id'] == titles[1]['id']
+
+    def test_02_facets_query_count(self, client, admin_client,
+                                   django_assert_max_num_queries):
+        create_titles(admin_client)
+        url = '/api/v1/titles/'
+        with django_assert_max_num_queries(7):
+            client.get(url, {'facets': 'true'})
+        with django_assert_max_num_queries(4):
+            response = client.get(url, {'facets': 'true'})
+        assert len(response.json()['facets']['genre']) == 3, (
+            'Проверьте, что фасеты кэшируются до изменения данных.'
+        )
+
+        admin_client.patch(f'{url}{response.json()["results"][0]["id"]}/',
+                           data={'year': 2001})
+        facets = client.get(url, {'facets': 'true'}).json()['facets']
+        assert facets['decade'] == [
+            {'decade': 2000, 'count': 1}, {'decade': 1980, 'count': 1}
+        ], 'Проверьте, что изменение произведения обновляет фасеты.'
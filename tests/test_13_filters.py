@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+import pytest
+from api.v1.filters import TitleFilter
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Title
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleFiltersAPI:
+
+    url = '/api/v1/titles/'
+
+    def get_ids(self, client, **params):
+        response = client.get(self.url, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}` с параметрами '
+            f'{params} возвращает ответ со статусом 200.'
+        )
+        return sorted(title['id'] for title in response.json()['results'])
+
+    def test_01_multi_value_filters(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.post(self.url, data={
+            'name': 'Кин-дза-дза!',
+            'year': 1986,
+            'genre': [genres[0]['slug'], genres[2]['slug']],
+            'category': categories[1]['slug']
+        })
+        titles.append(response.json())
+        first, second, third = (title['id'] for title in titles)
+        horror, comedy, drama = (genre['slug'] for genre in genres)
+
+        assert self.get_ids(client, genre=f'{horror},{drama}') == [
+            first, second, third
+        ], (
+            f'Проверьте, что `{self.url}?genre=a,b` возвращает произведения '
+            'с любым из жанров без повторов.'
+        )
+        assert self.get_ids(client, genre=f'{horror},{drama}',
+                            genre_mode='all') == [third], (
+            f'Проверьте, что `{self.url}?genre=a,b&genre_mode=all` '
+            'возвращает произведения со всеми жанрами списка.'
+        )
+        assert self.get_ids(client, genre=f'{horror},unknown',
+                            genre_mode='all') == []
+        assert self.get_ids(client, genre=comedy) == [first]
+        assert self.get_ids(
+            client, category=f'{categories[0]["slug"]},{categories[1]["slug"]}'
+        ) == [first, second, third], (
+            f'Проверьте, что `{self.url}?category=a,b` возвращает '
+            'произведения из любой категории списка.'
+        )
+        assert self.get_ids(client, category=categories[1]['slug'],
+                            genre=horror) == [third]
+
+        response = client.get(self.url, {'genre': horror,
+                                         'genre_mode': 'some'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_genre_filter_is_single_query(self, client, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        slugs = ','.join(genre['slug'] for genre in genres[:2])
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, {'genre': slugs,
+                                             'genre_mode': 'all'})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id']
+        ]
+        title_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_title"' in query['sql']
+        ]
+        assert len(title_queries) == 2, (
+            'Проверьте, что список произведений с фильтром по жанрам '
+            'читается запросом числа объектов и запросом страницы.'
+        )
+        for sql in title_queries:
+            assert 'DISTINCT' not in sql
+            assert 'reviews_genretitle' in sql and ' IN (SELECT' in sql, (
+                'Проверьте, что фильтр по жанрам выполняется подзапросом '
+                'к GenreTitle, а не соединением с выборкой.'
+            )
+
+    def test_03_year_range(self, client, admin_client):
+        titles, categories, _ = create_titles(admin_client)
+        first, second = (title['id'] for title in titles)
+
+        assert self.get_ids(client, year_min=1985) == [second], (
+            f'Проверьте, что `{self.url}?year_min=` фильтрует произведения '
+            'не раньше указанного года.'
+        )
+        assert self.get_ids(client, year_max=1985) == [first], (
+            f'Проверьте, что `{self.url}?year_max=` фильтрует произведения '
+            'не позже указанного года.'
+        )
+        assert self.get_ids(client, year_min=1980, year_max=1989,
+                            category=categories[0]['slug']) == [first]
+
+    def test_04_category_decade_uses_index(self):
+        queryset = TitleFilter(
+            {'category': 'films', 'year_min': 1990, 'year_max': 1999},
+            queryset=Title.objects.all()
+        ).qs
+        plan = queryset.explain()
+        assert 'title_category_year' in plan, (
+            'Проверьте, что запрос произведений по категории и '
+            'десятилетию использует индекс (category, year).\n' + plan
+        )
+        assert 'SCAN reviews_title' not in plan
@@ -0,0 +1,107 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments
+
+SCAN_RE = re.compile(r'^SCAN (\w+)')
+# Справочники из десятков строк просматриваются целиком дешевле индекса.
+SMALL_TABLES = ('reviews_category', 'reviews_genre')
+
+
+def full_scans(client, url):
+    """Выполняет GET-запрос и возвращает запросы, план которых
+    просматривает таблицу целиком при наличии условия WHERE."""
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает ответ со статусом '
+        '200.'
+    )
+    result = []
+    with connection.cursor() as cursor:
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or ' WHERE ' not in sql:
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = [row[-1] for row in cursor.fetchall()]
+            for line in plan:
+                match = SCAN_RE.match(line)
+                if match and match.group(1) not in SMALL_TABLES:
+                    result.append(f'{sql}\n  {plan}')
+    return result
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14QueryPlans:
+
+    def test_01_endpoints_use_indexes(self, admin_client, admin,
+                                      user_client, user, moderator_client,
+                                      moderator):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        })
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        # /users/?search= ищет подстроку (LIKE '%x%'), такое условие
+        # B-tree индекс не обслуживает, поэтому запрос не проверяется.
+        urls = (
+            '/api/v1/users/',
+            f'/api/v1/users/{user.username}/',
+            '/api/v1/users/me/',
+            '/api/v1/categories/',
+            '/api/v1/categories/?search=Фильм',
+            '/api/v1/genres/',
+            '/api/v1/genres/?search=Драма',
+            '/api/v1/titles/',
+            '/api/v1/titles/?category=films,books',
+            '/api/v1/titles/?genre=drama',
+            '/api/v1/titles/?genre=horror,comedy&genre_mode=all',
+            '/api/v1/titles/?year=1984',
+            '/api/v1/titles/?year_min=1980&year_max=1989',
+            '/api/v1/titles/?category=films&year_min=1980&year_max=1989',
+            '/api/v1/titles/?rating_min=5',
+            '/api/v1/titles/?ordering=-rating',
+            '/api/v1/titles/?name=Терминатор',
+            '/api/v1/titles/?q=терминатор',
+            '/api/v1/titles/?fuzzy=терминатр',
+            '/api/v1/titles/?facets=true&category=films',
+            '/api/v1/titles/export/?genre=drama',
+            title_url,
+            f'{title_url}rating-distribution/',
+            '/api/v1/titles/top/',
+            '/api/v1/titles/top/?genre=drama&category=films',
+            f'{title_url}reviews/',
+            review_url,
+            f'{review_url}comments/',
+            f'{review_url}comments/{comments[0]["id"]}/',
+        )
+        for url in urls:
+            scans = full_scans(admin_client, url)
+            assert not scans, (
+                f'Проверьте, что запросы GET `{url}` читают таблицы по '
+                'индексам. Полный просмотр таблицы:\n' + '\n'.join(scans)
+            )
+
+    def test_02_username_search_is_case_insensitive(self, admin_client,
+                                                    user):
+        url = '/api/v1/users/'
+        for term in (user.username.upper(), user.username[:5].lower(),
+                     user.username[1:]):
+            response = admin_client.get(url, {'search': term})
+            assert [item['username'] for item in response.json()['results']
+                    ] == [user.username], (
+                f'Проверьте, что `{url}?search=` ищет пользователей по '
+                'части username без учёта регистра.'
+            )
+        response = admin_client.get(url, {'search': 'nobody'})
+        assert response.json()['results'] == []
@@ -0,0 +1,199 @@
+import datetime as dt
+import json
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from api.renderers import FastJSONRenderer, StdlibJSONRenderer
+from api.v1 import views
+from api.v1.serializers import (CommentSerializer, ReviewSerializer,
+                                TitleReadSerializer)
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Comment, Review, Title
+
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15RepresentationAPI:
+
+    url = '/api/v1/titles/'
+
+    def test_01_sparse_fieldsets(self, client, admin_client,
+                                 django_assert_max_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+
+        with django_assert_max_num_queries(2) as context:
+            response = client.get(self.url, {'fields': 'id,name,rating'})
+        assert response.status_code == HTTPStatus.OK
+        assert not any('description' in query['sql']
+                       for query in context.captured_queries), (
+            f'Проверьте, что `{self.url}?fields=` не читает столбцы, '
+            'которых нет в списке полей.'
+        )
+        data = response.json()['results']
+        assert data == [
+            {'id': title['id'], 'name': title['name'], 'rating': None}
+            for title in titles
+        ], (
+            f'Проверьте, что `{self.url}?fields=` возвращает только '
+            'перечисленные поля и не загружает жанры.'
+        )
+
+        response = client.get(self.url, {'fields': 'name',
+                                         'expand': 'genre,category'})
+        item = response.json()['results'][0]
+        assert item == {
+            'name': titles[0]['name'],
+            'genre': [
+                {'name': genre['name'], 'slug': genre['slug']}
+                for genre in genres[:2]
+            ],
+            'category': {'name': categories[0]['name'],
+                         'slug': categories[0]['slug']},
+        }, (
+            f'Проверьте, что `{self.url}?expand=` добавляет к полям из '
+            '`fields` вложенные жанры и категорию.'
+        )
+
+        response = client.get(f'{self.url}{titles[1]["id"]}/',
+                              {'fields': 'year,description'})
+        assert response.json() == {'year': titles[1]['year'],
+                                   'description': titles[1]['description']}
+
+        response = client.get(self.url)
+        assert set(response.json()['results'][0]) == {
+            'id', 'name', 'year', 'rating', 'weighted_rating',
+            'description', 'genre', 'category'
+        }, 'Проверьте, что без `fields` возвращаются все поля.'
+
+    def test_02_sparse_fieldsets_validation(self, client):
+        for params in ({'fields': 'id,password'},
+                       {'fields': 'id', 'expand': 'reviews'}):
+            response = client.get(self.url, params)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что `{self.url}` с неизвестными полями в '
+                '`fields` или `expand` возвращает ответ со статусом 400.'
+            )
+        for params in ({'fields': ''}, {'fields': ',', 'expand': ''}):
+            response = client.get(self.url, params)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что `{self.url}` с пустым `fields` возвращает '
+                'ответ со статусом 400, а не пустые объекты.'
+            )
+            assert 'fields' in response.json()
+
+    def test_03_values_lists_match_serializers(self, client, admin_client,
+                                               admin, user_client, user):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client, user: user_client
+        })
+        Title.objects.filter(pk=titles[1]['id']).update(category=None)
+        title_url = f'{self.url}{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        cases = (
+            (self.url, TitleReadSerializer, Title.objects.all()),
+            (f'{title_url}reviews/', ReviewSerializer,
+             Review.objects.all()),
+            (f'{review_url}comments/', CommentSerializer,
+             Comment.objects.all()),
+        )
+        for url, serializer_class, queryset in cases:
+            expected = {
+                item['id']: item for item in json.loads(json.dumps(
+                    serializer_class(queryset, many=True).data
+                ))
+            }
+            results = client.get(url).json()['results']
+            assert len(results) == len(expected)
+            for item in results:
+                assert list(item.items()) == list(
+                    expected[item['id']].items()
+                ), (
+                    f'Проверьте, что список `{url}` совпадает с ответом '
+                    f'{serializer_class.__name__}, включая порядок полей.'
+                )
+
+    def test_04_json_renderers_match_drf(self, client, admin_client):
+        data = {
+            'text': 'Отзыв\u2028с переводом строки',
+            1: Decimal('7.50'),
+            'pub_date': dt.datetime(2023, 1, 1, tzinfo=dt.timezone.utc),
+            'day': dt.date(2023, 1, 2),
+            'lazy': gettext_lazy('Текст'),
+            'errors': [ErrorDetail('Ошибка', code='invalid')],
+            'empty': None,
+        }
+        expected = JSONRenderer().render(data)
+        for renderer in (FastJSONRenderer(), StdlibJSONRenderer()):
+            assert renderer.render(data) == expected, (
+                f'Проверьте, что {type(renderer).__name__} кодирует ответ '
+                'так же, как JSONRenderer.'
+            )
+
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(self.url)
+        assert titles[0]['name'].encode() in response.content, (
+            f'Проверьте, что `{self.url}` не экранирует не-ASCII символы.'
+        )
+
+    def test_05_json_parser(self, admin_client):
+        url = '/api/v1/categories/'
+        data = {'name': 'Сериалы', 'slug': 'series'}
+        response = admin_client.post(
+            url, json.dumps(data, ensure_ascii=False).encode(),
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json() == data, (
+            f'Проверьте, что POST-запрос к `{url}` разбирает тело в JSON.'
+        )
+        response = admin_client.post(url, b'{"name": ',
+                                     content_type='application/json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что POST-запрос к `{url}` с некорректным JSON '
+            'возвращает ответ со статусом 400.'
+        )
+
+    def test_06_ndjson_export(self, client, admin_client, monkeypatch,
+                              django_assert_num_queries):
+        create_titles(admin_client)
+        url = f'{self.url}export/'
+        monkeypatch.setattr(views, 'EXPORT_CHUNK_SIZE', 1)
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            f'Проверьте, что `{url}` отдаёт ответ через '
+            'StreamingHttpResponse.'
+        )
+        assert response['Content-Type'] == 'application/x-ndjson'
+        # Две порции по одному произведению с жанрами и пустая третья.
+        with django_assert_num_queries(5):
+            content = b''.join(response.streaming_content)
+        lines = content.decode().splitlines()
+        expected = sorted(client.get(self.url).json()['results'],
+                          key=lambda item: item['id'])
+        assert [json.loads(line) for line in lines] == expected, (
+            f'Проверьте, что `{url}` возвращает по одному произведению в '
+            'строке в порядке id, как в списке произведений.'
+        )
+
+        response = client.get(url, {'fields': 'id,name', 'year': 1988})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {'id': expected[1]['id'], 'name': expected[1]['name']}
+        ], (
+            f'Проверьте, что `{url}` учитывает фильтры и `fields`.'
+        )
+
+        for accept in ('application/json', 'text/html', '*/*'):
+            response = client.get(url, HTTP_ACCEPT=accept)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что `{url}` отдаёт NDJSON при заголовке '
+                f'`Accept: {accept}`, а не ответ со статусом 406.'
+            )
+            assert response['Content-Type'] == 'application/x-ndjson'
+            lines = b''.join(response.streaming_content).decode()
+            assert len(lines.splitlines()) == len(expected)
@@ -0,0 +1,228 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, GenreTitle, LeaderboardEntry, Title
+
+from tests.utils import (create_categories, create_genre,
+                         create_single_comment, create_single_review,
+                         create_titles)
+
+
+def make_titles(count, categories, genres):
+    return [
+        {
+            'name': f'Солярис {number}',
+            'year': 1972 + number,
+            'genre': [genres[number % 3]['slug'], genres[2]['slug']],
+            'category': categories[number % 2]['slug'],
+            'description': f'Фантастика номер {number}',
+        }
+        for number in range(count)
+    ]
+
+
+def create_moderation_data(admin_client, user_client, moderator_client):
+    """Отзывы на два произведения и комментарии к отзыву user."""
+
+    titles, _, _ = create_titles(admin_client)
+    reviews = {}
+    for title, scores in zip(titles, ((2, 4, 9), (6, None, 10))):
+        for client, score in zip(
+                (user_client, moderator_client, admin_client), scores):
+            if score is not None:
+                reviews[title['id'], client] = create_single_review(
+                    client, title['id'], f'Отзыв {score}', score
+                ).json()['id']
+    review_id = reviews[titles[0]['id'], user_client]
+    comments = [
+        create_single_comment(client, titles[0]['id'], review_id,
+                              'Комментарий').json()['id']
+        for client in (admin_client, moderator_client)
+    ]
+    return titles, reviews, comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16BulkAPI:
+
+    url = '/api/v1/titles/bulk/'
+
+    def test_01_bulk_create_titles(self, client, admin_client):
+        categories = create_categories(admin_client)
+        genres = create_genre(admin_client)
+        client.get('/api/v1/titles/')
+
+        # Первое произведение создаёт служебную запись статистики поиска.
+        admin_client.post(self.url, make_titles(1, categories, genres),
+                          format='json')
+        queries = []
+        for count in (2, 20):
+            data = make_titles(count, categories, genres)
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.post(self.url, data, format='json')
+            assert response.status_code == HTTPStatus.CREATED, (
+                f'Проверьте, что POST-запрос администратора к `{self.url}` '
+                'с корректным массивом возвращает ответ со статусом 201.'
+            )
+            queries.append(len(context.captured_queries))
+        assert queries[0] == queries[1], (
+            f'Проверьте, что число запросов `{self.url}` не зависит от '
+            'числа произведений в массиве.'
+        )
+
+        created = response.json()
+        assert [item['name'] for item in created] == [
+            item['name'] for item in data
+        ]
+        assert created[1]['genre'] == [
+            {'name': genres[1]['name'], 'slug': genres[1]['slug']},
+            {'name': genres[2]['name'], 'slug': genres[2]['slug']},
+        ]
+        assert created[1]['category'] == categories[1]
+        assert created[0]['genre'] == [
+            {'name': genres[0]['name'], 'slug': genres[0]['slug']},
+            {'name': genres[2]['name'], 'slug': genres[2]['slug']},
+        ]
+        assert created[2] == client.get(
+            f'/api/v1/titles/{created[2]["id"]}/'
+        ).json()
+
+        assert client.get('/api/v1/titles/').json()['count'] == 23, (
+            'Проверьте, что после массового создания кэш списка '
+            'произведений сбрасывается.'
+        )
+        title_id = created[4]['id']
+        assert LeaderboardEntry.objects.filter(title_id=title_id).count() == 3
+        for params in ({'q': 'фантастика 4'}, {'fuzzy': 'Солярис 4'}):
+            results = client.get('/api/v1/titles/', params).json()['results']
+            assert title_id in [item['id'] for item in results], (
+                'Проверьте, что произведения, созданные массово, попадают '
+                'в поисковые индексы.'
+            )
+
+    def test_02_bulk_create_errors(self, user_client, admin_client):
+        categories = create_categories(admin_client)
+        genres = create_genre(admin_client)
+        data = make_titles(3, categories, genres)
+        data[1]['genre'] = ['unknown']
+        data[2]['year'] = 'год'
+        response = admin_client.post(self.url, data, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что POST-запрос к `{self.url}` с некорректным '
+            'элементом возвращает ответ со статусом 400.'
+        )
+        errors = response.json()
+        assert len(errors) == 3 and errors[0] == {}, (
+            f'Проверьте, что `{self.url}` возвращает ошибки списком по '
+            'элементам массива.'
+        )
+        assert set(errors[1]) == {'genre'} and set(errors[2]) == {'year'}
+        assert not Title.objects.exists()
+        assert not GenreTitle.objects.exists()
+
+        data = make_titles(4, categories, genres)
+        data[1]['category'] = [categories[0]['slug']]
+        data[2]['category'] = {'slug': categories[0]['slug']}
+        data[3]['genre'] = [{'slug': genres[0]['slug']}]
+        response = admin_client.post(self.url, data, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что POST-запрос к `{self.url}` со списком или '
+            'словарём вместо slug возвращает ответ со статусом 400.'
+        )
+        errors = response.json()
+        assert errors[0] == {}
+        assert set(errors[1]) == set(errors[2]) == {'category'}
+        assert set(errors[3]) == {'genre'}
+        assert not Title.objects.exists()
+
+        response = admin_client.post(self.url, data[0], format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = user_client.post(self.url, data[:1], format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_03_bulk_delete_reviews(self, client, admin_client, user_client,
+                                    moderator_client):
+        titles, reviews, comments = create_moderation_data(
+            admin_client, user_client, moderator_client
+        )
+        first, second = (title['id'] for title in titles)
+        url = '/api/v1/moderation/'
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{first}/reviews/')
+        response = moderator_client.post(url, {
+            'action': 'delete',
+            'reviews': [reviews[first, user_client],
+                        reviews[second, admin_client]],
+        }, format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что POST-запрос модератора к `{url}` возвращает '
+            'ответ со статусом 200.'
+        )
+        assert response.json() == {'reviews': 2, 'comments': 0}
+        assert not Comment.objects.filter(pk__in=comments).exists(), (
+            'Проверьте, что комментарии удалённых отзывов удаляются.'
+        )
+        ratings = {
+            item['id']: item['rating']
+            for item in client.get('/api/v1/titles/').json()['results']
+        }
+        assert ratings == {first: 6.5, second: 6.0}, (
+            f'Проверьте, что `{url}` пересчитывает рейтинг затронутых '
+            'произведений и сбрасывает кэш списка.'
+        )
+        assert len(client.get(
+            f'/api/v1/titles/{first}/reviews/'
+        ).json()['results']) == 2
+        distribution = client.get(
+            f'/api/v1/titles/{second}/rating-distribution/'
+        ).json()
+        assert distribution['count'] == 1
+
+    def test_04_bulk_hide_reviews_and_comments(self, client, admin_client,
+                                               user_client, moderator_client):
+        titles, reviews, comments = create_moderation_data(
+            admin_client, user_client, moderator_client
+        )
+        first = titles[0]['id']
+        review_url = f'/api/v1/titles/{first}/reviews/'
+        user_review_url = f'{review_url}{reviews[first, user_client]}/'
+        url = '/api/v1/moderation/'
+        data = {'action': 'hide', 'reviews': [reviews[first, admin_client]],
+                'comments': [comments[1]]}
+        response = moderator_client.post(url, data, format='json')
+        assert response.json() == {'reviews': 1, 'comments': 1}
+        title = client.get(f'/api/v1/titles/{first}/').json()
+        assert title['rating'] == 3.0, (
+            'Проверьте, что скрытые отзывы не учитываются в рейтинге.'
+        )
+        assert len(client.get(review_url).json()['results']) == 2
+        hidden_url = f'{review_url}{reviews[first, admin_client]}/'
+        for hidden in (hidden_url, f'{hidden_url}comments/',
+                       f'{user_review_url}comments/{comments[1]}/'):
+            assert client.get(hidden).status_code == HTTPStatus.NOT_FOUND, (
+                'Проверьте, что скрытые отзывы и комментарии недоступны.'
+            )
+        assert [item['id'] for item in client.get(
+            f'{user_review_url}comments/'
+        ).json()['results']] == [comments[0]]
+
+        response = moderator_client.post(url, data, format='json')
+        assert response.json() == {'reviews': 0, 'comments': 0}
+        user_client.patch(user_review_url, {'score': 8}, format='json')
+        assert Title.objects.get(pk=first).rating == 6.0, (
+            'Проверьте, что изменение оценки учитывает только видимые '
+            'отзывы.'
+        )
+
+    def test_05_moderation_validation(self, user_client, moderator_client):
+        url = '/api/v1/moderation/'
+        data = {'action': 'delete', 'reviews': [1]}
+        assert user_client.post(url, data, format='json').status_code == (
+            HTTPStatus.FORBIDDEN
+        ), f'Проверьте, что `{url}` доступен только модераторам.'
+        for data in ({'action': 'delete'}, {'action': 'ban', 'reviews': [1]},
+                     {'action': 'hide', 'comments': ['x']}):
+            response = moderator_client.post(url, data, format='json')
+            assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,223 @@
+import csv
+import os
+import shutil
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Avg
+from django.test.utils import CaptureQueriesContext
+from api.management.commands.load import (FILES, StreamingLoader,
+                                          dependency_levels)
+from reviews.models import (Category, Comment, Genre, GenreTitle,
+                            LeaderboardEntry, LoadCheckpoint, Review, Title)
+from users.models import User
+
+from tests.conftest import MANAGE_PATH
+
+DATA_DIR = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def count_rows(name, data_dir=DATA_DIR):
+    with open(os.path.join(data_dir, name), encoding='utf-8') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+def rewrite(path, change):
+    """Перезаписывает CSV-файл строками, которые вернула change."""
+
+    with open(path, encoding='utf-8', newline='') as file:
+        reader = csv.DictReader(file)
+        fields = reader.fieldnames
+        rows = change(list(reader))
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def load(data_dir, **options):
+    out = StringIO()
+    call_command('load', data_dir=data_dir, stdout=out, **options)
+    return out.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17LoadCommand:
+
+    def test_01_load_csv(self, client):
+        output = load(DATA_DIR, batch_size=7)
+        for model, name in ((Title, 'titles.csv'),
+                            (GenreTitle, 'genre_title.csv'),
+                            (Review, 'review.csv')):
+            assert model.objects.count() == count_rows(name), (
+                f'Проверьте, что команда `load` загружает все строки '
+                f'файла {name}.'
+            )
+        assert 'отклонено 0' in output and 'строк/с' in output, (
+            'Проверьте, что команда `load` сообщает число отклонённых '
+            'строк и скорость загрузки.'
+        )
+        title = Title.objects.get(pk=1)
+        assert title.rating == pytest.approx(
+            Review.objects.filter(title=title).aggregate(Avg('score'))
+            ['score__avg']
+        ), 'Проверьте, что после загрузки рейтинги пересчитываются.'
+        assert LeaderboardEntry.objects.filter(title=title).exists()
+        results = client.get('/api/v1/titles/', {'q': title.name})
+        assert title.pk in [
+            item['id'] for item in results.json()['results']
+        ], 'Проверьте, что после загрузки перестраивается поисковый индекс.'
+
+    @pytest.mark.parametrize('workers', (1, 2))
+    def test_02_load_rejects_invalid_rows(self, tmp_path, workers):
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        with open(tmp_path / 'titles.csv', 'a', encoding='utf-8') as file:
+            file.write('\n100,Неизвестная категория,2000,99'
+                       '\n101,Неверный год,год,1')
+        with open(tmp_path / 'genre_title.csv', 'a',
+                  encoding='utf-8') as file:
+            file.write('\n100,1,1')
+
+        output = load(tmp_path, batch_size=10, workers=workers)
+        assert 'Title: загружено 32, отклонено 2' in output, (
+            'Проверьте, что команда `load` отклоняет строки с неверными '
+            'значениями и ссылками на несуществующие объекты.'
+        )
+        assert 'GenreTitle: загружено 42, отклонено 1' in output, (
+            'Проверьте, что строки, нарушающие ограничения БД, '
+            'отклоняются без отката остальных строк пакета.'
+        )
+        assert Review.objects.count() == count_rows('review.csv')
+        assert Comment.objects.count() == count_rows('comments.csv')
+        assert User.objects.count() == count_rows('users.csv')
+
+    def test_03_stream_resumes_after_interruption(self, tmp_path,
+                                                  monkeypatch):
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        with open(tmp_path / 'comments.csv', 'a', encoding='utf-8') as file:
+            file.write('\n1000,1,"Многострочный\n""комментарий""",'
+                       '100,2019-09-24T08:24:30.519Z')
+        insert = StreamingLoader.insert
+        calls = []
+
+        def interrupted_insert(loader, batch):
+            if loader.model is Review:
+                calls.append(len(batch))
+                if len(calls) == 3:
+                    raise KeyboardInterrupt
+            insert(loader, batch)
+
+        monkeypatch.setattr(StreamingLoader, 'insert', interrupted_insert)
+        with pytest.raises(KeyboardInterrupt):
+            load(tmp_path, batch_size=5, stream=True)
+        assert Review.objects.count() == 10, (
+            'Проверьте, что в потоковом режиме команда `load` фиксирует '
+            'каждый пакет отдельно.'
+        )
+        checkpoint = LoadCheckpoint.objects.get(
+            path=str(tmp_path / 'review.csv')
+        )
+        assert checkpoint.loaded == 10
+
+        monkeypatch.setattr(StreamingLoader, 'insert', insert)
+        output = load(tmp_path, batch_size=5, stream=True)
+        assert f'Review: продолжено после строки {checkpoint.line}' in output
+        assert (f'Review: загружено {count_rows("review.csv") - 10}, '
+                'отклонено 0') in output, (
+            'Проверьте, что после прерывания загрузка продолжается с '
+            'сохранённой позиции без повторной обработки строк.'
+        )
+        assert Review.objects.count() == count_rows('review.csv')
+        assert Comment.objects.count() == count_rows('comments.csv') + 1
+        assert Comment.objects.get(pk=1000).text == (
+            'Многострочный\n"комментарий"'
+        )
+        assert Title.objects.get(pk=1).rating is not None
+
+        output = load(tmp_path, stream=True)
+        assert 'Comment: загружено 0, отклонено 0' in output, (
+            'Проверьте, что повторный запуск не загружает строки заново.'
+        )
+        output = load(tmp_path, stream=True, restart=True)
+        assert f'Review: загружено 0, отклонено {count_rows("review.csv")}' \
+            in output, (
+                'Проверьте, что с --restart файлы читаются сначала, '
+                'а уже загруженные строки отклоняются.'
+            )
+
+    def test_04_dependency_levels(self):
+        assert dependency_levels([model for model, _ in FILES]) == [
+            [User, Category, Genre], [Title], [GenreTitle, Review], [Comment]
+        ], (
+            'Проверьте, что команда `load` группирует таблицы по '
+            'зависимостям внешних ключей.'
+        )
+
+    def test_05_upsert(self, client, tmp_path):
+        shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+        load(tmp_path)
+        output = load(tmp_path, upsert=True)
+        assert output.count('добавлено 0, обновлено 0,') == len(FILES), (
+            'Проверьте, что с --upsert строки, совпадающие с таблицей, '
+            'не записываются повторно.'
+        )
+        untouched = Title.objects.get(pk=3).updated_at
+        assert client.get('/api/v1/titles/1/').json()['rating'] == 10
+        assert len(client.get(
+            '/api/v1/titles/2/reviews/'
+        ).json()['results']) == 3
+
+        def change_titles(rows):
+            rows[0]['name'] = 'Рита Хейуорт и спасение из Шоушенка'
+            return rows + [{'id': '100', 'name': 'Новое произведение',
+                            'year': '2000', 'category': '1'}]
+
+        def change_reviews(rows):
+            rows[1]['score'] = '4'
+            return [row for row in rows if row['id'] != '4']
+
+        rewrite(tmp_path / 'titles.csv', change_titles)
+        rewrite(tmp_path / 'review.csv', change_reviews)
+        output = load(tmp_path, upsert=True, delete_missing=True)
+        assert 'Title: добавлено 1, обновлено 1,' in output
+        assert 'Review: добавлено 0, обновлено 1,' in output
+        assert 'Review: удалено 1' in output, (
+            'Проверьте, что с --delete-missing удаляются строки, которых '
+            'нет в файле.'
+        )
+        assert Review.objects.count() == count_rows('review.csv') - 1
+        assert Title.objects.get(pk=3).updated_at == untouched, (
+            'Проверьте, что с --upsert неизменённые строки не обновляются.'
+        )
+        title = client.get('/api/v1/titles/1/').json()
+        assert title['name'] == 'Рита Хейуорт и спасение из Шоушенка', (
+            'Проверьте, что синхронизация сбрасывает кэш изменённых '
+            'произведений.'
+        )
+        assert title['rating'] == 7
+        assert Title.objects.get(pk=2).rating == 6.5
+        assert len(client.get(
+            '/api/v1/titles/2/reviews/'
+        ).json()['results']) == 2
+        results = client.get('/api/v1/titles/', {'q': 'Хейуорт'}).json()
+        assert [item['id'] for item in results['results']] == [1], (
+            'Проверьте, что синхронизация обновляет поисковый индекс.'
+        )
+        assert LeaderboardEntry.objects.filter(title_id=100).exists()
+
+    def test_06_reload_wipes_tables_in_bulk(self):
+        load(DATA_DIR)
+        with CaptureQueriesContext(connection) as context:
+            load(DATA_DIR)
+        queries = [query['sql'] for query in context.captured_queries]
+        titles = count_rows('titles.csv')
+        for table in ('reviews_leaderboardentry', 'reviews_searchposting',
+                      'reviews_trigramposting'):
+            assert sum(table in sql for sql in queries) < titles, (
+                'Проверьте, что перед загрузкой таблицы очищаются целиком, '
+                'а не по одной строке с обработчиками сигналов.'
+            )
+        assert 'DELETE FROM "reviews_comment"' in queries
+        assert Title.objects.count() == titles